@@ -114,6 +114,101 @@ version = "0.5.0"
 #		     checks for that. 
 #		 - adjust screen formatting to fill entire 7" screen.
 #		    Space for a couple more radio stations
+#		 - use MPD's 'idle' command on a second connection, so the
+#		    'now playing' display is only refreshed when MPD reports
+#		    a change, rather than polling every 2 seconds.
+#		    Set eventmode = poll in [basic] to go back to polling.
+#		 - TKinter's mainloop() now runs the program.  Refreshing the
+#		    status, elapsed time and artwork are tasks scheduled with
+#		    window.after(), so button presses are handled immediately
+#		    instead of waiting for a time.sleep(2) to finish.
+#		 - a worker thread now owns the MPD client connection. Buttons
+#		    and tasks put commands on its queue with mpdSubmit(), and
+#		    results come back to TKinter through resultQueue, so the
+#		    screen never freezes waiting for a slow MPD server.
+#		 - optional asyncio backend (backend = asyncio in [basic]).
+#		    One connection waits in 'idle', a second sends commands,
+#		    both run by one asyncio event loop.  Artwork is then 
+#		    fetched alongside the status updates instead of after them.
+#		 - MPD() looks commands up in a table instead of two long 
+#		    if/elif chains, takes any number of arguments, and logs 
+#		    how long each command took.  readpicture, albumart, rm and
+#		    save now go through MPD() too, so they also reconnect.
+#		 - MPDbatch() sends several commands as one MPD command list, 
+#		    so loading a playlist or station, or removing a song,
+#		    is a single network round trip.
+#		 - loadplaylist no longer waits a fixed 2 seconds to check the
+#		    playlist or station was accepted.  waitForPlayer() returns 
+#		    as soon as MPD reports it is playing, or reports an error, 
+#		    or after playtimeout seconds (in [basic]).
+#		 - album artwork is kept in a cache directory on disk (see 
+#		    [artwork] in the .ini file), so it is only fetched from 
+#		    MPD once per album, even after a restart.
+#		 - recently displayed artwork is kept in memory as ready to 
+#		    use PhotoImages (up to memcache bytes), so returning to an
+#		    album or station does not decode the image again.
+#		 - while a track plays, the next track's details and artwork 
+#		    are fetched in the background, so when it starts the 
+#		    title and artwork appear together.
+#		 - artwork from readpicture / albumart is collected in memory 
+#		    rather than written to cover.png and read back again. 
+#		    Only the artwork cache writes to the SD card.
+#		 - ask MPD for bigger artwork chunks (binarylimit in [basic]), 
+#		    so a large cover takes a few round trips instead of dozens.
+#		    Each artwork transfer's time is logged.
+#		 - radio station artwork is downloaded in the background with 
+#		    a timeout, and kept in the artwork cache.  After radiottl 
+#		    seconds it is checked again, using ETag / Last-Modified 
+#		    so an unchanged logo is not downloaded again.
+#		 - shortly after starting, all the radio stations' artwork is 
+#		    fetched in parallel (a few at a time, and at most 
+#		    prewarmperhost at once from any one web server), so it is 
+#		    ready the first time a station button is pressed.
+#		 - 'KitchenPlayer_0.5.0.py --index-art [playlist]' fills the 
+#		    artwork cache for the whole music library (or one stored
+#		    playlist) using several processes, then exits.  Folders 
+#		    which haven't changed since the last run are skipped, so 
+#		    it can be stopped and restarted, eg run overnight by cron.
+#		 - find_file() remembers the list of files in each folder 
+#		    (including that folder.jpg ISN'T there), so only the first
+#		    track of an album goes to the network share to look.
+#		 - large JPEG artwork (eg 3000x3000 folder.jpg scans) is decoded
+#		    at reduced size using PIL's draft mode, and the resize 
+#		    filter is chosen to suit the amount of scaling.  Decode and
+#		    resize times are logged.
+#		 - like the 0.3.0 countdown, the elapsed time is counted 
+#		    locally from the last status and the clock, redrawn each 
+#		    second, and only checked with MPD on events or every 
+#		    resyncinterval seconds (in [basic]).
+#		 - the display functions go through showText() and showImage(),
+#		    which remember what each widget is showing and leave it
+#		    alone if nothing changed.  No more window.update() - TKinter
+#		    redraws everything changed by one refresh in a single pass
+#		    once the callback returns.
+#		 - updateIni() no longer rewrites the .ini file on every change.
+#		    Changes are kept in memory and written together once
+#		    things have been quiet for iniflushdelay seconds (in 
+#		    [basic]), or when we quit.  The file is written to a 
+#		    temporary file and renamed, so a crash can't corrupt it.
+#		 - [Select] pops up a touch keyboard to choose an Artist or 
+#		    Album from the current playlist, and jumps to its first
+#		    track.  The names come from an index built from one 
+#		    playlistinfo when the playlist is loaded, so typing 
+#		    doesn't have to ask MPD anything.  Uses [searchwin] swingeo.
+#		 - when the queue changes ([Remove], or another client) the 
+#		    [Select] index is patched with just the changed rows from 
+#		    plchangesposid, rather than reading the whole queue again.
+#		 - songs are held in a small Song object instead of the dict 
+#		    from MPD.  Numbers are converted once, tag strings are 
+#		    interned, and comparing two songs just checks id and title.
+#		 - currentsong is only asked for when status shows a different
+#		    songid or queue version (or for a radio stream, when the
+#		    player changed - the title changes with the same id).
+#		 - radio stream_URLs which are .pls, .m3u / HLS .m3u8 playlists
+#		    or redirects are followed once, and the address they lead 
+#		    to is cached (for streamttl seconds, in [basic]) and given 
+#		    to MPD.  If MPD can't play it we fall back to the original.
+#		    The time taken to resolve each station is logged.
 #		 - 
 
 # Initial Volume on buttons
@@ -145,16 +240,31 @@ from PIL import ImageTk, Image	# requires PIL libary
 import musicpd			# requires python-musicpd 
 				# refer: https://kaliko.gitlab.io/python-musicpd/
 import datetime
-from time import sleep
 import sys
 from configparser import ConfigParser
 import os
 import urllib.request
+import urllib.error
+import urllib.parse
+import json
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import io
+import tempfile
 import time
 import logging
-from collections import OrderedDict
+import hashlib
+from select import select as socketReady	# not "import select" - select() is the [Select] button
+import threading
+import queue
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
 from pathlib import Path
+import unicodedata
+import bisect
+from functools import lru_cache
 
 #if sys.platform != "win32":
 #    import subprocess
@@ -280,6 +390,22 @@ logger.info("    -----======<<<<  STARTING UP  >>>>======-----")
 
 wglst = confparse.get("mainwindow","maingeo").split(',')
 
+#artwinilist = [300, 300]
+artwinilist = cp.getlist('mainwindow','artimage')	# size of the album art image
+artwinilist[0] = int(artwinilist[0]) 		# convert to integers
+artwinilist[1] = int(artwinilist[1])
+#logger.debug(f"integers    artwinilist[0]={artwinilist[0]}, artwinilist[1]={artwinilist[1]}")
+
+#
+# command line options.  Normally there are none, and the player starts.
+#
+argParser = argparse.ArgumentParser(description=programTitle)
+argParser.add_argument('--index-art', nargs='?', const='', default=None, metavar='PLAYLIST',
+                       help="fill the artwork cache for the music library (or one stored playlist), then exit")
+argParser.add_argument('--processes', type=int, default=os.cpu_count() or 2,
+                       help="number of processes used by --index-art")
+args = argParser.parse_args()
+
 #
 # get MPD server details
 #
@@ -288,6 +414,18 @@ serverip   = confparse.get('serverstats', 'lastsrvr')
 serverport = confparse.get('basic','serverport')
 MPD_music_directory = confparse.get('basic','music_directory')
 MPD_playlist_directory = confparse.get('basic','playlist_directory')
+# 'idle' waits for MPD to tell us something changed, 'poll' checks every 2 seconds
+eventMode = confparse.get('basic','eventmode', fallback='idle')
+# 'musicpd' uses python-musicpd, 'asyncio' uses KitchenPlayer's own asyncio client
+backendName = confparse.get('basic','backend', fallback='musicpd')
+# longest time to wait for MPD to start playing a newly loaded playlist or station
+playTimeout = float(confparse.get('basic','playtimeout', fallback='5'))
+# largest chunk of artwork MPD sends in one answer (MPD's default is 8192). 0 = leave MPD's default
+binaryLimit = int(confparse.get('basic','binarylimit', fallback='0'))
+# while playing, how often to check our elapsed time against MPD's (seconds)
+resyncInterval = float(confparse.get('basic','resyncinterval', fallback='30'))
+# how long updateIni waits for changes to stop before writing the .ini file (seconds)
+iniFlushDelay = float(confparse.get('basic','iniflushdelay', fallback='5'))
 
 #logger.debug("don1 confparse basic returns  serverlist="+ serverlist +", serverip="+ serverip +"  serverport="+ serverport )
 if serverip == "":
@@ -308,9 +446,25 @@ if version != confparse.get('program','version'):
     #### should this be an error because program and config file out of sync ???
     confparse.set('program','version',version )
 
+#
+#	writeIni() writes the configuration to a temporary file, then renames
+#	it over the .ini file, so a crash or power cut part way through
+#	can never leave us with a half-written configuration
+#
+iniPending = {}			# (section, key) : value changed since the last write
+
+def writeIni():
+    tempname = f"{iniFilename}.tmp"
+    with open(tempname, 'w') as SLcnf:
+        confparse.write(SLcnf)
+        SLcnf.flush()
+        os.fsync(SLcnf.fileno())	# make sure it is on the SD card before the rename
+    os.replace(tempname, iniFilename)
+    logger.debug(f"writeIni  saved {iniFilename}, changes={iniPending}")
+    iniPending.clear()
+
 # update all the .ini configuration parameters
-with open(iniFilename, 'w') as SLcnf:
-     confparse.write(SLcnf)
+writeIni()
 
 
 
@@ -341,6 +495,19 @@ except  (ValueError, musicpd.ConnectionError, ConnectionRefusedError,ConnectionA
 else:
     logger.debug("D1| Connect to MPD client successful")
 
+#
+#	A second connection is used only to wait in MPD's 'idle' command.
+#	MPD answers it as soon as one of the subsystems changes, so the 
+#	'now playing' display can be refreshed straight away, and nothing 
+#	is sent over the network while nothing is happening.
+#	Buttons use the main client connection, so never have to cancel the idle.
+#
+idleSubsystems = ['player','mixer','options','playlist']
+idleClient = musicpd.MPDClient()	# connection used only for idle
+idleClient.timeout = None
+idlePending = False			# True while an idle command is waiting for MPD
+idleRetryAt = 0				# time.monotonic() when we can next try to reconnect
+
 
 #########################################################################
 #									#
@@ -352,8 +519,52 @@ else:
 #
 		# currStatus  is current value of dict client.status()
 currStatus = dict()		# define current MPD state as a dict
-		# currSong  is current value of dict client.currentsong()
-currSong = dict()		# define current song as a dict
+#
+#	Song holds the details of one song from currentsong or playlistid.
+#	__slots__ keeps it small, the numbers are converted once here instead
+#	of every time they are displayed, and tag strings are interned so 
+#	all the songs by one artist share one copy of the name.
+#	Two Songs are equal if they have the same id and title - a radio
+#	stream keeps the same id, but its title changes with each song.
+#
+def songTag(song, tag):
+    value = song.get(tag, '')
+    if isinstance(value, list):
+        value = ', '.join(value)	# python-musicpd gives a list when a tag appears more than once
+    return sys.intern(value)
+
+
+class Song:
+    __slots__ = ('file', 'id', 'pos', 'title', 'artist', 'album', 'name', 'track', 'duration')
+
+    def __init__(self, song=None):
+        song = song or {}
+        self.file   = song.get('file', '')
+        self.id     = int(song['id']) if 'id' in song else None
+        self.pos    = int(song['pos']) if 'pos' in song else None
+        self.title  = songTag(song, 'title')
+        self.artist = songTag(song, 'artist')
+        self.album  = songTag(song, 'album')
+        self.name   = songTag(song, 'name')		# name of the radio station
+        track = songTag(song, 'track').split('/')[0]	# may be '3/12'
+        self.track  = int(track) if track.isdigit() else None
+        duration = song.get('duration', song.get('time'))
+        self.duration = float(duration) if duration is not None else None
+
+    def __eq__(self, other):
+        if not isinstance(other, Song):
+            return NotImplemented
+        return self.id == other.id and self.title == other.title
+
+    def __bool__(self):
+        return self.file != ''		# Song() is no song
+
+    def __repr__(self):
+        return f"Song(id={self.id}, file={self.file!r}, title={self.title!r})"
+
+
+		# currSong  is the Song from client.currentsong()
+currSong = Song()		# no song yet
 currPlaylist = ''
 
 
@@ -365,28 +576,50 @@ currPlaylist = ''
 #########################################################################
 
 def endWithError(msg):
+    if args.index_art is not None:
+        # --index-art has no window to show the message in
+        logger.info(f"--index-art  {msg}")
+        print(msg)
+        sys.exit(1)
+    if threading.current_thread() is not threading.main_thread():
+        # only TKinter's thread can show the message and close the window
+        runOnTk(endWithError, msg)
+        return
     messagebox.showinfo("UhOh",msg)
     sys.exit()
     window.destroy()
 
 
 
+#
+#	updateIni() changes the setting straight away, but leaves writing the
+#	file until the changes have stopped for iniFlushDelay seconds.  
+#	A run of volume presses is then one write instead of one per press.
+#
 def updateIni(section, key, value):
     confparse.set(section,key,value)
-    with open(iniFilename, 'w') as SLcnf:
-        confparse.write(SLcnf)
+    iniPending[(section, key)] = value
     logger.debug("ini file  section [{}] updated with {} = {}".format(section, key, value) )
+    schedule('saveini', int(iniFlushDelay * 1000), writeIni)	# restarts the quiet period
+
+
+def flushIni():
+    # write any changes still waiting, eg when we quit
+    cancelTask('saveini')
+    if len(iniPending) > 0:
+        writeIni()
 
 
 
 def exit():
-    global client, window
     logger.debug("EXIT() Connections closed. Playback stopped. Quitting.")
-    MPD('stop')				#  client.stop()
-    sleep(2)
-    currStatus = client.status()
-#    logger.debug("after 1st attempt, client.status()={}".format(client.status()) )
+    # close the window once the worker thread has told MPD to stop
+    mpdSubmit('stop', callback=exitDone, onError=exitDone)	#  client.stop() - and quit even if that fails
+
 
+def exitDone(result):
+    global window
+    flushIni()
 #    sys.exit()				# sys.exit works for single thread, 
 					# but tkinter needs the main window destroyed
     window.destroy()				# close tkinter window, exiting the program
@@ -414,87 +647,631 @@ def fileExists( filename ):
 #
 #	If the connection has dropped, try to reconnect it
 #
-def MPD(mpdFunction,*arg1):
+#	mpdCommands lists every MPD command KitchenPlayer uses.  The client
+#	method for each is looked up once, then kept in mpdDispatch, so 
+#	finding it again is a single dictionary lookup.
+#
+mpdCommands = frozenset([
+    # status functions
+    'status', 'currentsong', 'ping',
+    # playback
+    'play', 'pause', 'next', 'previous', 'stop', 'volume', 'setvol', 'clearerror',
+    # options
+    'random', 'repeat', 'consume', 'single',
+    # queue and stored playlists
+    'clear', 'load', 'add', 'deleteid', 'playlistinfo', 'listplaylists', 'save', 'rm',
+    # artwork
+    'readpicture', 'albumart',
+    # prefetching the next song
+    'playlistid',
+    # --index-art
+    'listplaylist',
+    # [Select]
+    'playid', 'plchanges', 'plchangesposid',
+])
+mpdDispatch = {		# command name : client method
+    'connect': lambda: client.connect(serverip, int(serverport)),
+}
+
+def mpdMethod(mpdFunction):
+    method = mpdDispatch.get(mpdFunction)
+    if method is None:
+        method = getattr(client, mpdFunction)
+        mpdDispatch[mpdFunction] = method
+    return method
+
+
+def MPD(mpdFunction,*args):
     global serverip,serverport
-    if len(arg1) > 0 :	arg1 = arg1[0]		# only one optional argument
-    logger.debug("MPD({},{}) called".format(mpdFunction,arg1) )
-    try:
-	# status functions (in anticipated order of frequency, for efficiency)
-        if   mpdFunction == 'connect':      return client.connect(serverip,serverport)
-        elif mpdFunction == 'status':       return client.status()
-        elif mpdFunction == 'currentsong':  return client.currentsong()
-        elif mpdFunction == 'play':         return client.play()
-        elif mpdFunction == 'pause':        return client.pause()
-        elif mpdFunction == 'next':         return client.next()
-        elif mpdFunction == 'previous':     return client.previous()
-        elif mpdFunction == 'volume':       return client.volume(arg1)
-        elif mpdFunction == 'load':         return client.load(arg1)
-        elif mpdFunction == 'add':          return client.add(arg1)
-        elif mpdFunction == 'clear':        return client.clear()
-        elif mpdFunction == 'clearerror':   return client.clearerror()
-        elif mpdFunction == 'stop':         return client.stop()
-        elif mpdFunction == 'setvol':       return client.setvol(arg1)
-        elif mpdFunction == 'listplaylists': return client.listplaylists()
-        elif mpdFunction == 'deleteid':     return client.deleteid(arg1)
-        elif mpdFunction == 'save':         return client.save(arg1)
-        elif mpdFunction == 'ping':         return client.ping()
-        elif mpdFunction == 'random':       return client.random(arg1)
-        elif mpdFunction == 'repeat':       return client.repeat(arg1)
-        elif mpdFunction == 'consume':      return client.consume(arg1)
-        elif mpdFunction == 'single':       return client.single(arg1)
-        else:
-            logger.info("MPD - unknown function "+ mpdFunction +" requested.")
+    if mpdFunction not in mpdCommands and mpdFunction != 'connect':
+        logger.info("MPD - unknown function "+ mpdFunction +" requested.")
+        return
+    logger.debug("MPD({},{}) called".format(mpdFunction,args) )
+    started = time.monotonic()
+    if mpdBackend is not None:
+        # the asyncio backend does its own connecting and reconnecting
+        if mpdFunction == 'connect':
+            return
+        try:
+            retVal = mpdBackend.call(mpdFunction, *args)
+        except musicpd.ConnectionError as errvar:
+            logger.debug(f"MPD({mpdFunction},{args}) asyncio backend errvar={errvar}")
+            endWithError("The server you selected has stopped responding. ")
+            return
+    else:
+        try:
+            retVal = mpdMethod(mpdFunction)(*args)
+        except (musicpd.ConnectionError, ConnectionRefusedError,ConnectionAbortedError, musicpd.ProtocolError) as errvar:
+            logger.debug("MPD({},{}) 1st exception errvar={}".format(mpdFunction,args,errvar))
+            mpdReconnect(errvar)
+            # and try the command again
+            retVal = mpdMethod(mpdFunction)(*args)
+
+    # if we got here connection is OK - otherwise we already did an endWithError !
+    logger.debug(f"MPD({mpdFunction}) took {(time.monotonic() - started) * 1000:.1f} ms")
+    return retVal
+
 
+#
+#	MPDbatch(('clear',), ('load',name), ('play',)) sends the commands to 
+#	MPD as a single command list, so they only cost one network round 
+#	trip.  Returns a list with the result of each command.
+#	If any command fails, MPD stops at that command and 
+#	musicpd.CommandError is raised.
+#
+def MPDbatch(*commands):
+    for command in commands:
+        if command[0] not in mpdCommands:
+            logger.info("MPDbatch - unknown function "+ command[0] +" requested.")
+            return
+    logger.debug(f"MPDbatch({commands}) called")
+    started = time.monotonic()
+    if mpdBackend is not None:
+        try:
+            retVal = mpdBackend.callList(commands)
+        except musicpd.ConnectionError as errvar:
+            logger.debug(f"MPDbatch({commands}) asyncio backend errvar={errvar}")
+            endWithError("The server you selected has stopped responding. ")
+            return
+    else:
+        try:
+            retVal = mpdCommandList(commands)
+        except (musicpd.ConnectionError, ConnectionRefusedError,ConnectionAbortedError, musicpd.ProtocolError) as errvar:
+            logger.debug(f"MPDbatch({commands}) 1st exception errvar={errvar}")
+            mpdReconnect(errvar)
+            retVal = mpdCommandList(commands)
+    logger.debug(f"MPDbatch({len(commands)} commands) took {(time.monotonic() - started) * 1000:.1f} ms")
+    return retVal
+
+
+#
+#	MPDiterate('playlistinfo') is like MPD(), but hands back the songs 
+#	one at a time as MPD sends them, instead of first building a list 
+#	of 17000 dicts.  Only use it from the MPD worker thread, and read
+#	it right to the end before sending MPD anything else.
+#
+def MPDiterate(mpdFunction, *args):
+    if mpdBackend is not None:
+        yield from MPD(mpdFunction, *args) or []	# the asyncio backend reads the whole answer anyway
+        return
+    logger.debug(f"MPDiterate({mpdFunction},{args}) called")
+    started = time.monotonic()
+    count = 0
+    client.iterate = True
+    try:
+        for item in mpdMethod(mpdFunction)(*args):
+            count += 1
+            yield item
     except (musicpd.ConnectionError, ConnectionRefusedError,ConnectionAbortedError, musicpd.ProtocolError) as errvar:
-        logger.debug("MPD({},{}) 1st exception errvar={}".format(mpdFunction,arg1,errvar))
+        logger.debug(f"MPDiterate({mpdFunction},{args}) exception after {count} items, errvar={errvar}")
+        mpdReconnect(errvar)
+        raise
+    finally:
+        client.iterate = False
+    logger.debug(f"MPDiterate({mpdFunction}) {count} items took {(time.monotonic() - started) * 1000:.1f} ms")
+
+
+def mpdCommandList(commands):
+    client.command_list_ok_begin()
+    for command in commands:
+        mpdMethod(command[0])(*command[1:])	# python-musicpd sends each one now...
+    return client.command_list_end()		# ...but reads all the answers here, in one go
+
+
+#
+#	MPDidle(['player'], timeout) waits on the commands connection (so ONLY 
+#	use it from the MPD worker thread) for up to timeout seconds for MPD 
+#	to report a change in one of the subsystems.  Returns the list of 
+#	changed subsystems, or [] if nothing changed in time.
+#
+def MPDidle(subsystems, timeout):
+    if mpdBackend is not None:
+        return mpdBackend.callIdle(subsystems, timeout)
+    try:
+        client.send_idle(*subsystems)
+        ready, _, _ = socketReady([client.fileno()], [], [], timeout)
+        if ready:
+            return client.fetch_idle()
+        return client.noidle()		# cancel the idle - MPD answers with any changes so far
+    except (musicpd.ConnectionError, ConnectionRefusedError,ConnectionAbortedError, musicpd.ProtocolError, OSError) as errvar:
+        logger.debug(f"MPDidle({subsystems}) exception errvar={errvar}")
+        mpdReconnect(errvar)
+        return subsystems		# we may have missed something
+
+
+#
+#	setBinaryLimit() asks MPD to send artwork in chunks of binaryLimit 
+#	bytes.  Call it after every connect.  MPD older than 0.22.4 (or an
+#	older python-musicpd) doesn't have binarylimit, so just carry on.
+#
+def setBinaryLimit():
+    if binaryLimit <= 0:
+        return
+    try:
+        client.binarylimit(binaryLimit)
+        logger.debug(f"setBinaryLimit  MPD binarylimit set to {binaryLimit}")
+    except (musicpd.CommandError, AttributeError) as errvar:
+        logger.info(f"setBinaryLimit  MPD cannot change binarylimit, using default chunks: {errvar}")
+
+
+#
+# assume connection to MPD server has dropped, so reconnect 
+#	(or end the program if MPD cannot be reached)
+#
+def mpdReconnect(errvar):
+    if errvar == 'Already connected':
+        return
+    try:
+        errvar = ''
+        logger.debug("MPD  Try to reconnect to {} on port {}".format(serverip,serverport))
+        client.connect(serverip, int(serverport))
+        setBinaryLimit()
+    except  (ValueError, musicpd.ConnectionError, ConnectionRefusedError,ConnectionAbortedError) as errvar:
+        logger.debug("MPD  2nd exception errvar={}".format(errvar))
         if errvar == 'Already connected':
             pass
+        elif 'WinError' in str(errvar) or 'Not connected' in str(errvar):
+            endWithError("The server you selected has stopped responding. ")
         else:
-            #
-            # assume connection to MPD server has dropped, so reconnect and try again
-            #
+            logger.debug("MPD  ***** MPD() second level error {} *****".format(errvar) ) 
+            endWithError("The server you selected is not responding.")
+
+
+
+#########################################################################
+#									#
+#		asyncio MPD backend (optional)				#
+#									#
+#########################################################################
+#
+#	With backend = asyncio in [basic], MPD() sends commands through
+#	AsyncBackend instead of python-musicpd.  It runs an asyncio event 
+#	loop on its own thread, with two connections to MPD:
+#	   'events'	waits in 'idle', and tells TKinter when MPD changes
+#	   'commands'	everything else.  Each command holds the connection
+#			only for its own round trip, so a status request can
+#			slip in between the chunks of an artwork transfer.
+#	Answers are returned the same way python-musicpd returns them, 
+#	so the rest of the program does not care which backend is used.
+#
+asyncReturnTypes = {	# how each command's answer is returned (default: None)
+    'status': 'object',    'currentsong': 'object', 'stats': 'object',
+    'readpicture': 'object', 'albumart': 'object',
+    'idle': 'changed',
+    'listplaylists': 'list', 'playlistinfo': 'list', 'playlistid': 'list',
+    'plchanges': 'list',   'plchangesposid': 'list', 'listall': 'list',
+    'lsinfo': 'list',
+}
+asyncListDelimiters = {'file', 'directory', 'playlist', 'cpos'}	# keys which start a new list item
+
+
+def asyncQuote(arg):
+    # MPD arguments are quoted, with backslash and " escaped
+    arg = str(arg).replace('\\', '\\\\').replace('"', '\\"')
+    return '"' + arg + '"'
+
+
+class AsyncMPDConnection:
+    # a single connection to MPD, used only from the asyncio event loop
+    def __init__(self, name):
+        self.name = name
+        self.reader = None
+        self.writer = None
+        self.lock = None		# created on the event loop's thread
+
+    async def connect(self):
+        logger.debug(f"AsyncMPDConnection {self.name}  connect to MPD at {serverip} on port {serverport}")
+        self.reader, self.writer = await asyncio.open_connection(serverip, int(serverport))
+        hello = await self.reader.readline()
+        if not hello.startswith(b"OK MPD "):
+            self.close()
+            raise musicpd.ConnectionError(f"Not an MPD server: {hello}")
+        if self.name == "commands" and binaryLimit > 0:
+            # bigger artwork chunks - see setBinaryLimit()
+            self.writer.write(f"binarylimit {binaryLimit}\n".encode("utf-8"))
+            await self.writer.drain()
             try:
-                errvar = ''
-                logger.debug("MPD  Try to reconnect to {} on port {}".format(serverip,serverport))
-                client.connect(serverip, int(serverport))
-            except  (ValueError, musicpd.ConnectionError, ConnectionRefusedError,ConnectionAbortedError) as errvar:
-                logger.debug("MPD({},{}) 2nd exception errvar={}".format(mpdFunction,arg1,errvar))
-                if errvar == 'Already connected':
-                    pass
-                elif 'WinError' in str(errvar) or 'Not connected' in str(errvar):
-                    endWithError("The server you selected has stopped responding. ")
-                else:
-                    logger.debug("MPD  ***** MPD() second level error {} *****".format(errvar) ) 
-                    endWithError("The server you selected is not responding.")
-        # Repeat the long if statement
-        if   mpdFunction == 'connect':      return client.connect(serverip,serverport)
-        elif mpdFunction == 'status':       return client.status()
-        elif mpdFunction == 'currentsong':  return client.currentsong()
-        elif mpdFunction == 'play':         return client.play()
-        elif mpdFunction == 'pause':        return client.pause()
-        elif mpdFunction == 'next':         return client.next()
-        elif mpdFunction == 'previous':     return client.previous()
-        elif mpdFunction == 'volume':       return client.volume(arg1)
-        elif mpdFunction == 'load':         return client.load(arg1)
-        elif mpdFunction == 'add':          return client.add(arg1)
-        elif mpdFunction == 'stop':         return client.stop()
-        elif mpdFunction == 'clear':        return client.clear()
-        elif mpdFunction == 'clearerror':   return client.clearerror()
-        elif mpdFunction == 'setvol':       return client.setvol(arg1)
-        elif mpdFunction == 'listplaylists': return client.listplaylists()
-        elif mpdFunction == 'deleteid':     return client.deleteid(arg1)
-        elif mpdFunction == 'save':         return client.save(arg1)
-        elif mpdFunction == 'ping':         return client.ping()
-        elif mpdFunction == 'random':       return client.random(arg1)
-        elif mpdFunction == 'repeat':       return client.repeat(arg1)
-        elif mpdFunction == 'consume':      return client.consume(arg1)
-        elif mpdFunction == 'single':       return client.single(arg1)
+                await self.readAnswer()
+            except musicpd.CommandError as errvar:
+                logger.info(f"AsyncMPDConnection  MPD cannot change binarylimit, using default chunks: {errvar}")
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = None
+        self.writer = None
+
+    async def command(self, name, *args):
+        answers = await self.send([(name,) + args])
+        return asyncConvert(name, answers[0])
+
+    async def commandList(self, commands):
+        # commands is a list of tuples ('name', arg, ...), sent as one command list
+        answers = await self.send(commands)
+        return [asyncConvert(command[0], pairs) for command, pairs in zip(commands, answers)]
+
+    async def send(self, commands):
+        # send the command(s), and return a list of the answers' (key, value) pairs
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        lines = [" ".join([command[0]] + [asyncQuote(arg) for arg in command[1:]]) for command in commands]
+        if len(commands) > 1:
+            lines = ["command_list_ok_begin"] + lines + ["command_list_end"]
+        request = ("\n".join(lines) + "\n").encode("utf-8")
+        async with self.lock:
+            # if the connection has dropped, reconnect and try once more
+            for attempt in (1, 2):
+                try:
+                    if self.writer is None:
+                        await self.connect()
+                    self.writer.write(request)
+                    await self.writer.drain()
+                    if len(commands) == 1:
+                        return [await self.readAnswer()]
+                    answers = [await self.readAnswer("list_OK") for command in commands]
+                    await self.readAnswer()		# final OK for the whole list
+                    return answers
+                except (OSError, EOFError, asyncio.IncompleteReadError, musicpd.ConnectionError) as errvar:
+                    logger.debug(f"AsyncMPDConnection {self.name}  {lines[0]} attempt {attempt} errvar={errvar}")
+                    self.close()
+                    if attempt == 2:
+                        raise musicpd.ConnectionError(str(errvar))
+
+    async def idleFor(self, subsystems, timeout):
+        # wait up to timeout seconds for a change, then cancel the idle with noidle
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        request = (" ".join(['idle'] + [asyncQuote(arg) for arg in subsystems]) + "\n").encode("utf-8")
+        async with self.lock:
+            try:
+                if self.writer is None:
+                    await self.connect()
+                self.writer.write(request)
+                await self.writer.drain()
+                try:
+                    pairs = await asyncio.wait_for(self.readAnswer(), timeout)
+                except asyncio.TimeoutError:
+                    self.writer.write(b"noidle\n")
+                    await self.writer.drain()
+                    pairs = await self.readAnswer()
+            except (OSError, EOFError, asyncio.IncompleteReadError, musicpd.ConnectionError) as errvar:
+                logger.debug(f"AsyncMPDConnection {self.name}  idle attempt errvar={errvar}")
+                self.close()
+                return list(subsystems)		# we may have missed something
+        return asyncConvert('idle', pairs)
+
+    async def readAnswer(self, endLine="OK"):
+        # read lines up to endLine, returning a list of (key, value) pairs.
+        #	binary data (readpicture, albumart) is returned as ('data', bytes)
+        pairs = []
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                raise musicpd.ConnectionError("Connection lost while reading MPD answer")
+            line = line.decode("utf-8").rstrip("\n")
+            if line == endLine:
+                return pairs
+            if line.startswith("ACK "):
+                raise musicpd.CommandError(line)
+            key, _, value = line.partition(": ")
+            pairs.append((key, value))
+            if key == "binary":
+                data = await self.reader.readexactly(int(value))
+                await self.reader.readexactly(1)	# newline after the data
+                pairs.append(("data", data))
+
+
+def asyncConvert(name, pairs):
+    # turn (key, value) pairs into what python-musicpd would have returned
+    returnType = asyncReturnTypes.get(name)
+    if returnType == 'changed':
+        return [value for key, value in pairs if key == 'changed']
+    if returnType == 'object':
+        items = asyncItems(pairs, set())
+        return items[0] if items else {}
+    if returnType == 'list':
+        return asyncItems(pairs, asyncListDelimiters)
+    return None
+
+
+def asyncItems(pairs, delimiters):
+    # keys are lower case, as python-musicpd returns them (eg 'id', 'pos')
+    items = []
+    item = None
+    for key, value in pairs:
+        key = key.lower()
+        if item is None or (key in delimiters and item):
+            item = {}			# start the next song / playlist / ...
+            items.append(item)
+        if key in item:
+            # repeated tags (eg several artists) become a list, like python-musicpd
+            if not isinstance(item[key], list):
+                item[key] = [item[key]]
+            item[key].append(value)
         else:
-            logger.info("unknown function "+ mpdFunction +" requested.")
+            item[key] = value
+    return items
+
+
+class AsyncBackend:
+    # the asyncio event loop and its two MPD connections
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.commands = AsyncMPDConnection("commands")
+        self.events = AsyncMPDConnection("events")
+        self.thread = threading.Thread(target=self.loop.run_forever, name="mpdAsyncio", daemon=True)
+        self.thread.start()
+
+    def call(self, name, *args):
+        # run one MPD command from any other thread, and wait for its answer
+        future = asyncio.run_coroutine_threadsafe(self.commands.command(name, *args), self.loop)
+        return future.result()
+
+    def callIdle(self, subsystems, timeout):
+        # wait (from any other thread) for a change reported on the commands connection
+        future = asyncio.run_coroutine_threadsafe(self.commands.idleFor(subsystems, timeout), self.loop)
+        return future.result()
+
+    def callList(self, commands):
+        # run a command list from any other thread, and wait for the answers
+        future = asyncio.run_coroutine_threadsafe(self.commands.commandList(commands), self.loop)
+        return future.result()
+
+    def watchIdle(self):
+        asyncio.run_coroutine_threadsafe(self.idleLoop(), self.loop)
+
+    async def idleLoop(self):
+        while True:
+            try:
+                changed = await self.events.command('idle', *idleSubsystems)
+            except (musicpd.ConnectionError, musicpd.CommandError) as errvar:
+                logger.info(f"AsyncBackend idleLoop  errvar={errvar}")
+                await asyncio.sleep(5)
+                changed = idleSubsystems	# we may have missed something
+            logger.debug(f"AsyncBackend idleLoop  MPD reports changes in {changed}")
+            runOnTk(idleChanged, changed)
 
-    # if we got here connection is OK - otherwise we already did an endWithError !
-    logger.debug("MPD returns {}.")		#.format(retVal) )
-    return 
+
+mpdBackend = None
+if backendName == 'asyncio' and args.index_art is None:		# --index-art always uses python-musicpd
+    logger.debug("Using the asyncio MPD backend")
+    mpdBackend = AsyncBackend()
+
+
+
+#########################################################################
+#									#
+#		MPD worker thread					#
+#									#
+#########################################################################
+#
+#	The worker thread owns the 'client' connection to MPD, so only it
+#	ever waits for the network.  Buttons and tasks put jobs on mpdQueue
+#	with mpdSubmit(); a job is either an MPD command name (which is 
+#	passed to MPD()) or a function to run on the worker thread.
+#	If a callback is given, it is put on resultQueue with the result, 
+#	and pumpResults() calls it on TKinter's thread.  runOnTk() also 
+#	writes a byte to resultPipe, which TKinter is watching, so 
+#	pumpResults() only runs when there is something for it to do.
+#	If the job fails, onError (if given) is called the same way with the
+#	exception, so whoever is waiting for the result isn't left waiting.
+#	TKinter widgets must ONLY be changed from callbacks, never from jobs.
+#
+mpdQueue = queue.Queue()	# jobs waiting for the worker thread
+resultQueue = queue.Queue()	# callbacks waiting for TKinter's thread
+
+def mpdSubmit(job, *args, callback=None, onError=None, background=False):
+    # background=True marks slow jobs (eg artwork) which the asyncio 
+    #	backend can run alongside other jobs.  python-musicpd only has
+    #	one connection, so for it everything goes through mpdQueue
+    if background and mpdBackend is not None:
+        if not callable(job):
+            job, args = MPD, (job,) + args
+        backgroundSubmit(job, *args, callback=callback, onError=onError)
+        return
+    mpdQueue.put((job, args, callback, onError))
+
+
+#
+#	backgroundSubmit() runs jobs which don't need the python-musicpd
+#	connection (eg downloading radio station artwork) on a small pool
+#	of threads, so they can run at the same time as the MPD jobs
+#
+backgroundPool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="background")
+
+def backgroundSubmit(job, *args, callback=None, onError=None):
+    future = backgroundPool.submit(job, *args)
+    if callback is not None or onError is not None:
+        future.add_done_callback(lambda future: backgroundDone(future, job, callback, onError))
+
+
+def backgroundDone(future, job, callback, onError=None):
+    try:
+        result = future.result()
+    except Exception as e:
+        logger.exception(f"backgroundDone  job {job} failed: {e}")
+        if onError is not None:
+            runOnTk(onError, e)
+        return
+    if callback is not None:
+        runOnTk(callback, result)
+
+
+# Windows TKinter can't watch files or sockets, so there pumpResults()
+#	and watchMPD() fall back to checking on a timer
+tkWatchesFiles = hasattr(tk._tkinter.TkappType, 'createfilehandler')
+if tkWatchesFiles:
+    resultPipe = os.pipe()		# (read, write) - a byte written wakes TKinter
+    os.set_blocking(resultPipe[0], False)
+    os.set_blocking(resultPipe[1], False)
+else:
+    resultPipe = None
+
+def runOnTk(function, *args):
+    # thread-safe way to have function(*args) called by TKinter's thread
+    resultQueue.put((function, args))
+    if resultPipe is None:
+        return				# pumpResults() will find it on its next check
+    try:
+        os.write(resultPipe[1], b'.')
+    except BlockingIOError:
+        pass				# pipe full - TKinter has plenty of wake-ups waiting already
+
+
+def mpdWorker():
+    logger.debug("mpdWorker thread started")
+    while True:
+        job, args, callback, onError = mpdQueue.get()
+        try:
+            if callable(job):
+                result = job(*args)
+            else:
+                result = MPD(job, *args)
+        except Exception as e:
+            logger.exception(f"mpdWorker  job {job}{args} failed: {e}")
+            if onError is not None:
+                runOnTk(onError, e)
+            continue
+        if callback is not None:
+            runOnTk(callback, result)
+
+
+def pumpResults():
+    # run any callbacks the worker thread has sent us
+    if resultPipe is not None:
+        try:
+            while os.read(resultPipe[0], 4096):
+                pass			# empty the pipe, one pass of the queue does them all
+        except BlockingIOError:
+            pass
+    while True:
+        try:
+            function, args = resultQueue.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            function(*args)
+        except Exception as e:
+            logger.exception(f"pumpResults  {function} failed: {e}")
+    if not tkWatchesFiles:
+        schedule('results', 20, pumpResults)	# Windows TKinter can't watch the pipe, so keep checking
+
+
+def startResults():
+    # have TKinter call pumpResults() whenever runOnTk() writes to the pipe
+    if tkWatchesFiles:
+        window.tk.createfilehandler(resultPipe[0], tk.READABLE, lambda fd, mask: pumpResults())
+    else:
+        schedule('results', 20, pumpResults)
+
+mpdThread = threading.Thread(target=mpdWorker, name="mpdWorker", daemon=True)
+
+
+
+#########################################################################
+#									#
+#		Wait for MPD to report a change				#
+#									#
+#########################################################################
+#
+#	idleCheck(timeout) sends 'idle' (if not already waiting) and 
+#	returns the list of changed subsystems, or [] if MPD had nothing 
+#	to report within timeout seconds.  select() is used so we never 
+#	block inside musicpd waiting for the answer.
+#
+def idleCheck(timeout):
+    global idlePending, idleRetryAt
+    if time.monotonic() < idleRetryAt:
+        return []			# idle connection failed recently - don't keep hammering MPD
+    try:
+        if not idlePending:
+            idleClient.send_idle(*idleSubsystems)
+            idlePending = True
+        ready, _, _ = socketReady([idleClient.fileno()], [], [], timeout)
+        if not ready:
+            return []			# nothing changed yet - idle is still waiting
+        idlePending = False
+        changed = idleClient.fetch_idle()
+        logger.debug(f"idleCheck  MPD reports changes in {changed}")
+        return changed
+    except (musicpd.ConnectionError, musicpd.ProtocolError, OSError) as errvar:
+        #
+        # idle connection not made yet, or has dropped - (re)connect it
+        # and report everything as changed, since we may have missed something
+        #
+        logger.debug(f"idleCheck  (re)connecting idle client, errvar={errvar}")
+        idlePending = False
+        try:
+            idleClient.disconnect()
+        except Exception:
+            pass
+        try:
+            idleClient.connect(serverip, int(serverport))
+        except (ValueError, musicpd.ConnectionError, OSError) as errvar:
+            logger.info(f"idleCheck  cannot connect idle client: {errvar}")
+            idleRetryAt = time.monotonic() + 5
+        return idleSubsystems
+
+
+
+
+#########################################################################
+#									#
+#	Scheduler - timed and triggered tasks run by TKinter		#
+#									#
+#########################################################################
+#
+#	Everything which used to be done in the 'while True' loop is now 
+#	a task run by window.after(), so TKinter's mainloop() is always 
+#	free to handle button presses.
+#	Each task has a name.  Scheduling a task which is already pending 
+#	replaces it, so a task is never queued up to run twice.
+#
+scheduledTasks = {}		# task name : TKinter after() id
+
+def schedule(name, delay, function):
+    # run function after delay milliseconds
+    cancelTask(name)
+    scheduledTasks[name] = window.after(delay, runTask, name, function)
+
+
+def trigger(name, function):
+    # run function as soon as TKinter has finished what it is doing
+    schedule(name, 0, function)
+
+
+def cancelTask(name):
+    if name in scheduledTasks:
+        window.after_cancel(scheduledTasks.pop(name))
+
+
+def runTask(name, function):
+    scheduledTasks.pop(name, None)
+    try:
+        function()
+    except Exception as e:
+        # don't let one failed task stop the others
+        logger.exception(f"runTask  task '{name}' failed: {e}")
 
 
 
@@ -555,38 +1332,36 @@ def wingeoxlator(geostring,geovals,geolist):
 #
 def btnPause():			# The user has pressed the Pause button
     logger.debug("btnPause() called ")	#with currStatus['state']={}.".format(currStatus['state']) )
-    MPD('pause')			# client.pause()
+    mpdSubmit('pause')			# client.pause()
 
 
 def btnPlay():			# The user has pressed the Play button
 #    logger.debug('btnPlay() called with currStatus={}.'.format(currStatus) )
     logger.debug("btnPlay() called ")	#with currStatus['state']={}.".format(currStatus['state']) )
-    MPD('play')				# client.play()	# start MPD playing
+    mpdSubmit('play')			# client.play()	# start MPD playing
 
 
 def next():
-    MPD('next')		# client.next()
+    mpdSubmit('next')		# client.next()
 
 
 def previous():
-    MPD('previous')        # client.previous()
+    mpdSubmit('previous')  # client.previous()
 
 
 def volup():
 #    global lastvol
     vol_int = int(lastvol) + 5
     if vol_int <= 100:
-        client.setvol(vol_int)
-        volbtncolor(vol_int)
+        volbtncolor(vol_int)		# also tells MPD the new volume
 
 
 def voldn():
 #    global lastvol
     vol_int = int(lastvol) - 5
     if vol_int >= 0:
-        client.setvol(vol_int)
 #        vol_int = vol_int - 5
-        volbtncolor(vol_int)
+        volbtncolor(vol_int)		# also tells MPD the new volume
 
 
 def plrandom(stat):
@@ -612,11 +1387,11 @@ def togl(key):
         symb = symb.lower()
         msg = key + ' is set to OFF.'
     if key == 'random': 
-        client.random(stat)
+        mpdSubmit('random',stat)
         plrandom(stat)
-    if key == 'repeat': client.repeat(stat)
-    if key == 'consume': client.consume(stat)
-    if key == 'single': client.single(stat)
+    if key == 'repeat': mpdSubmit('repeat',stat)
+    if key == 'consume': mpdSubmit('consume',stat)
+    if key == 'single': mpdSubmit('single',stat)
     logger.debug("togl({}) toggleStatus={}, toggleSymbols={},  msg={}".format(key,toggleStatus,toggleSymbols,msg) )
     displaytrack(msg,'')
     toggleStatus[key] = stat
@@ -634,9 +1409,307 @@ def toglsingle():
 #									#
 #########################################################################
 #
+# Our playlists have thousands of tracks, so asking MPD for every 
+#	keystroke would be far too slow.  Instead when a playlist is 
+#	loaded the worker thread reads the queue once, with a single
+#	playlistinfo, into queueIndex :
+#	  'artist' and 'album'	normalised name : set of queue positions
+#	  'shown'		(kind, normalised name) : name as in the tags
+#	  'sorted'		kind : sorted normalised names (None = sort again)
+#	  'songs'		queue position : (song id, names)
+#	  'ids'			song id : names		(names are [(kind, normalised name, name)])
+#	The sorted names let bisect find all the names starting with what 
+#	has been typed in microseconds.
+#	'version' is MPD's queue version the index matches; when status 
+#	shows a different version indexCheck() fetches just the changes.
+#
+def newIndex(playlist, version=None):
+    return {'playlist': playlist, 'version': version, 'ready': False, 'updating': False,
+            'artist': {}, 'album': {}, 'shown': {},
+            'sorted': {'artist': None, 'album': None}, 'songs': {}, 'ids': {}}
+
+queueIndex = newIndex(None)
+
+
+@lru_cache(maxsize=8192)
+def normaliseName(name):
+    # casefold and strip accents, so typing 'beyonce' finds 'Beyoncé'
+    name = unicodedata.normalize('NFKD', name.casefold())
+    return ''.join(c for c in name if not unicodedata.combining(c)).strip()
+
+
+def songNames(song):
+    names = []
+    for kind in ('artist', 'album'):
+        values = song.get(kind, [])
+        if isinstance(values, str):
+            values = [values]		# python-musicpd gives a list when a tag appears more than once
+        for value in values:
+            key = normaliseName(value)
+            if key != '':
+                names.append((kind, key, sys.intern(value)))
+    return names
+
+
+def indexPut(index, pos, songID, names):
+    for kind, key, value in names:
+        if key not in index[kind]:
+            index[kind][key] = set()
+            index['shown'][(kind, key)] = value
+            index['sorted'][kind] = None
+        index[kind][key].add(pos)
+    index['songs'][pos] = (songID, names)
+    index['ids'][songID] = names
+
+
+def indexDrop(index, pos):
+    # take the song at pos out of the index, and return its id
+    songID, names = index['songs'].pop(pos)
+    for kind, key, value in names:
+        positions = index[kind].get(key)
+        if positions is None:
+            continue			# the same name twice in one song
+        positions.discard(pos)
+        if not positions:
+            del index[kind][key]
+            del index['shown'][(kind, key)]
+            index['sorted'][kind] = None
+    return songID
+
+
+def indexAdd(index, song):
+    indexPut(index, int(song['pos']), song['id'], songNames(song))
+
+
+def indexQueue():
+    # forget the old index, and have the worker thread build one for currPlaylist
+    global queueIndex
+    queueIndex = newIndex(currPlaylist)
+    if playlistType.get(currPlaylist) == 'playlist':
+        mpdSubmit(indexJob, currPlaylist, callback=indexDone, onError=indexFailed, background=True)
+
+
+def indexJob(playlist):		# runs on the MPD worker thread
+    started = time.monotonic()
+    # get the queue version first - anything changed after this is picked up later
+    index = newIndex(playlist, MPD('status')['playlist'])
+    for song in MPDiterate('playlistinfo'):
+        indexAdd(index, song)
+    index['ready'] = True
+    logger.info(f"indexJob  playlist {playlist}: {len(index['songs'])} songs, {len(index['artist'])} artists, "
+                f"{len(index['album'])} albums in {time.monotonic() - started:.2f} sec")
+    return index
+
+
+def indexDone(index):
+    global queueIndex
+    if index['playlist'] != queueIndex['playlist']:
+        return				# another playlist has been loaded since
+    queueIndex = index
+    if searchWin is not None:
+        searchShow()			# the pop-up was waiting for it
+
+
+#
+#	indexCheck() is called with each new status.  If MPD's queue version
+#	has moved on, the worker thread asks for plchangesposid - just the 
+#	position and id of each changed row.  Songs we already know (eg moved
+#	up one place by [Remove]) don't need asking about; the few new ones
+#	are fetched with playlistid in one command list.
+#
+indexFetchLimit = 200		# more new songs than this, just read them all with plchanges
+
+def indexCheck():
+    version = currStatus.get('playlist')
+    if not queueIndex['ready'] or queueIndex['updating'] or version in (None, queueIndex['version']):
+        return
+    queueIndex['updating'] = True
+    mpdSubmit(indexUpdateJob, queueIndex['playlist'], queueIndex['version'], set(queueIndex['ids']),
+              callback=indexUpdateDone, onError=indexFailed, background=True)
+
+
+def indexUpdateJob(playlist, version, knownIDs):	# runs on the MPD worker thread
+    started = time.monotonic()
+    status = MPD('status')		# the length and version we are catching up to
+    changes = [(int(row['cpos']), row['id']) for row in MPD('plchangesposid', version)]
+    unknown = [songID for pos, songID in changes if songID not in knownIDs]
+    fetched = {}
+    try:
+        if len(unknown) > indexFetchLimit:
+            for song in MPDiterate('plchanges', version):
+                fetched[song['id']] = songNames(song)
+        elif unknown:
+            for songs in MPDbatch(*[('playlistid', songID) for songID in unknown]):
+                for song in songs:
+                    fetched[song['id']] = songNames(song)
+    except musicpd.CommandError as errvar:
+        # eg a song was deleted again before we asked for it - don't 
+        #	try again straight away, it can go on failing while the 
+        #	queue keeps changing; indexUpdateDone reads it all instead
+        logger.info(f"indexUpdateJob  cannot fetch new songs: {errvar}")
+        return playlist, version, None, None, None, None
+    logger.debug(f"indexUpdateJob  queue version {version} -> {status['playlist']}: {len(changes)} changed rows, "
+                 f"{len(fetched)} new songs in {(time.monotonic() - started) * 1000:.1f} ms")
+    return playlist, version, status['playlist'], int(status['playlistlength']), changes, fetched
+
+
+def indexUpdateDone(result):
+    playlist, oldVersion, newVersion, length, changes, fetched = result
+    if playlist != queueIndex['playlist'] or oldVersion != queueIndex['version']:
+        return				# the index has been rebuilt since we asked
+    queueIndex['updating'] = False
+    if changes is None:
+        indexQueue()			# couldn't catch up, so start again from scratch
+        return
+    songs = queueIndex['songs']
+    # take out the rows which have changed, and any past the new end of the queue
+    removed = set()
+    for pos in [pos for pos, songID in changes] + [pos for pos in songs if pos >= length]:
+        if pos in songs:
+            removed.add(indexDrop(queueIndex, pos))
+    # and put in what is there now
+    added = set()
+    for pos, songID in changes:
+        names = fetched.get(songID, queueIndex['ids'].get(songID))
+        if names is None:
+            logger.info(f"indexUpdateDone  no details for song id {songID}, reading the whole queue again")
+            indexQueue()
+            return
+        indexPut(queueIndex, pos, songID, names)
+        added.add(songID)
+    for songID in removed - added:
+        del queueIndex['ids'][songID]	# no longer in the queue
+    queueIndex['version'] = newVersion
+    logger.debug(f"indexUpdateDone  index now at queue version {newVersion}, {len(songs)} songs")
+    if searchWin is not None:
+        searchShow()
+    indexCheck()			# in case it changed again meanwhile
+
+
+def indexFailed(e):
+    # leave the index not ready - pressing [Select] will try again
+    queueIndex['playlist'] = None
+    queueIndex['updating'] = False
+
+
+def indexLookup(kind, typed, limit):
+    # return up to limit of the normalised names starting with typed
+    keys = queueIndex['sorted'][kind]
+    if keys is None:
+        keys = queueIndex['sorted'][kind] = sorted(queueIndex[kind])
+    prefix = normaliseName(typed)
+    matches = []
+    for key in keys[bisect.bisect_left(keys, prefix):]:
+        if not key.startswith(prefix) or len(matches) >= limit:
+            break
+        matches.append(key)
+    return matches
+
+
+#
+#	the [Select] pop-up : what has been typed, [Artist]/[Album] choice, 
+#	a button for each matching name, and a touch screen keyboard
+#
+searchWin = None		# the pop-up window, while it is open
+searchState = {'kind': 'artist', 'text': ''}
+searchWidgets = {}
+searchKeys = ["1234567890", "QWERTYUIOP", "ASDFGHJKL'", "ZXCVBNM &<"]	# '<' is backspace
+searchRows = 5			# number of matching names shown
+
 def select():
-    logger.debug("select() called - add code later !")
-#button_select = tk.Button(main_frame, width=9, bg='gray90', text="Select", font=nnFont, command=select)
+    global searchWin
+    if currPlaylist == "" or playlistType.get(currPlaylist) != 'playlist':
+        messagebox.showinfo("Select", "Choose a playlist first - [Select] finds an Artist or Album in it")
+        return
+    if searchWin is not None:
+        searchWin.lift()
+        return
+    if queueIndex['playlist'] != currPlaylist:
+        indexQueue()			# eg the index failed - the names appear when it is ready
+    logger.debug(f"select() called   index ready={queueIndex['ready']}")
+
+    searchState['text'] = ''
+    searchWin = tk.Toplevel(window)
+    searchWin.title("Select an Artist or Album")
+    searchWin.geometry(wingeoxlator('',confparse.get('searchwin','swingeo').split(','),''))
+    searchWin.protocol("WM_DELETE_WINDOW", searchClose)
+    keyFont = Font(family=fontfamily, size=max(8, int(fontsize) * 2 // 3))
+
+    searchWidgets['typed'] = tk.Label(searchWin, text='', font=nnFont, bg='white', anchor='w')
+    searchWidgets['typed'].grid(column=0, columnspan=6, row=0, sticky='ew', padx=2, pady=2)
+    searchWidgets['kind'] = tk.Button(searchWin, bg='gray90', font=keyFont, command=searchKind)
+    searchWidgets['kind'].grid(column=6, columnspan=2, row=0, sticky='ew', padx=2, pady=2)
+    tk.Button(searchWin, bg='gray90', text="Close", font=keyFont, command=searchClose
+              ).grid(column=8, columnspan=2, row=0, sticky='ew', padx=2, pady=2)
+
+    searchWidgets['results'] = []
+    for row in range(searchRows):
+        button = tk.Button(searchWin, bg='gray90', font=keyFont, anchor='w')
+        button.grid(column=0, columnspan=10, row=row+1, sticky='ew', padx=2)
+        searchWidgets['results'].append(button)
+
+    for row, keys in enumerate(searchKeys):
+        for column, key in enumerate(keys):
+            tk.Button(searchWin, bg='gray80', font=keyFont, width=2, text="<-" if key == '<' else key,
+                      command=lambda key=key: searchKey(key)
+                      ).grid(column=column, row=row+searchRows+1, sticky='ew', padx=1, pady=1)
+    searchWin.columnconfigure(list(range(10)), weight=1)
+    searchShow()
+
+
+def searchKey(key):
+    if key == '<':
+        searchState['text'] = searchState['text'][:-1]
+    else:
+        searchState['text'] += key
+    searchShow()
+
+
+def searchKind():
+    searchState['kind'] = 'album' if searchState['kind'] == 'artist' else 'artist'
+    searchShow()
+
+
+def searchShow():
+    # show what has been typed, and the names which start with it
+    kind = searchState['kind']
+    searchWidgets['typed'].configure(text=searchState['text'] + '_')
+    searchWidgets['kind'].configure(text=kind.capitalize())
+    if not queueIndex['ready'] or queueIndex['playlist'] != currPlaylist:
+        matches = []
+        waiting = f"reading playlist {currPlaylist} ..."
+    else:
+        started = time.perf_counter()
+        matches = indexLookup(kind, searchState['text'], searchRows)
+        logger.debug(f"searchShow  '{searchState['text']}' found {len(matches)} {kind}s in {(time.perf_counter() - started) * 1000:.2f} ms")
+        waiting = f"-- no {kind} starting with '{searchState['text']}' --"
+    for row, button in enumerate(searchWidgets['results']):
+        if row < len(matches):
+            key = matches[row]
+            name = queueIndex['shown'][(kind, key)]
+            button.configure(text=f"{name}  ({len(queueIndex[kind][key])})", 
+                             command=lambda key=key: searchPlay(kind, key))
+        else:
+            button.configure(text=waiting if row == 0 else '', command=btn_disabled)
+
+
+def searchPlay(kind, key):
+    # play the first track in the queue by that artist, or from that album
+    positions = queueIndex[kind].get(key)
+    if not positions:
+        return
+    songID = queueIndex['songs'][min(positions)][0]
+    logger.info(f"searchPlay  {kind} '{queueIndex['shown'][(kind, key)]}' - playid {songID}")
+    mpdSubmit('playid', songID)
+    searchClose()
+
+
+def searchClose():
+    global searchWin
+    # remember where the pop-up was, in case it has been moved
+    updateIni('searchwin','swingeo', wingeoxlator(searchWin.geometry(),None,''))
+    searchWin.destroy()
+    searchWin = None
 
 
 
@@ -659,40 +1732,50 @@ def remove():
     logger.debug("remove() currPlaylist={}, currSong={}, currStatus={}.".format(currPlaylist,currSong,currStatus) )
     # determine which is the offending song
     songID = currStatus['songid']
-    if currSong['id'] != songID:
-        messagebox.showinfo("ERROR - SONG IDs DO NOT MATCH", f" currSong['id']={currSong['id']}, currStatus['songid']={songID}" )
-    filename = currSong['file']
+    if currSong.id != int(songID):
+        messagebox.showinfo("ERROR - SONG IDs DO NOT MATCH", f" currSong.id={currSong.id}, currStatus['songid']={songID}" )
+    filename = currSong.file
     # confirm it is to be removed  
-    if messagebox.askokcancel("Are you sure ?",f"REMOVE {currSong['title']}" ):
-        # remove from the playlist
-        client.deleteid(songID)
-        logger.warning('##### LOG: remove {} by {} from playlist {}'.format(currSong['title'],currSong['artist'],currPlaylist) )
-        try:
+    if messagebox.askokcancel("Are you sure ?",f"REMOVE {currSong.title}" ):
+        logger.warning('##### LOG: remove {} by {} from playlist {}'.format(currSong.title,currSong.artist,currPlaylist) )
+        # the worker thread does the removing
+        mpdSubmit(removeJob, songID, currPlaylist, filename)
+
+
+def removeJob(songID, currPlaylist, filename):		# runs on the MPD worker thread
+    # remove from the queue, and replace playlist file with modified version, 
+    #	all as one command list
+    try:
 #            client.save(currPlaylist,'replace')	# replace playlist file with modified version
 # MPD docs show save <playlist> having a parameter for create or replace, 
 # but python-musicpd does not allow a parameter
 # Think maybe i need to delete and then crease
-            client.rm(currPlaylist)		# replace playlist file with modified version
-            client.save(currPlaylist)		# replace playlist file with modified version
-        except Exception as e:
-            logger.debug(f"client.save exception {e}")
+        MPDbatch(('deleteid',songID), ('rm',currPlaylist), ('save',currPlaylist))
+    except musicpd.CommandError as e:
+        # MPD stops at the failing command (eg rm of a playlist which 
+        #	doesn't exist yet), so make sure the playlist still gets saved
+        logger.debug(f"MPDbatch deleteid/rm/save exception {e}")
+        try:
+            MPD('save',currPlaylist)
+        except musicpd.CommandError as e:
+            logger.debug(f"MPD('save') exception {e}")
 
-        # delete the file from the music directory
-        filename = MPD_music_directory + slash + filename
+    # delete the file from the music directory
+    filename = MPD_music_directory + slash + filename
+    try:
+        temp = os.path.isfile( filename)
+    except Exception as e:
+        logger.debug(f"os.path.isfile()  exception {e}")
+    if temp:
+#            logger.debug('remove    os.remove({})'.format(  filename) )
         try:
-            temp = os.path.isfile( filename)
+            os.remove(path_to_dat / filename)
+            # log the file which was deleted (in case it should be reinstated manually later)
+            logger.warning('##### LOG: removed file {}'.format(filename) )
         except Exception as e:
-            logger.debug(f"os.path.isfile()  exception {e}")
-        if temp:
-#            logger.debug('remove    os.remove({})'.format(  filename) )
-            try:
-                os.remove(path_to_dat / filename)
-                # log the file which was deleted (in case it should be reinstated manually later)
-                logger.warning('##### LOG: removed file {}'.format(filename) )
-            except Exception as e:
-                logger.debug(f"os.remove(filename) exception {e}")
-        else:
-            logger.debug(f"   ## NOT isfile")
+            logger.debug(f"os.remove(filename) exception {e}")
+    else:
+        logger.debug(f"   ## NOT isfile")
 
 
 #########################################################################
@@ -740,44 +1823,113 @@ def artWindow(thisimage):
 #    logger.debug(f"artWindow({thisimage}) called .")
     if thisimage == '':
         thisimage = path_to_dat / "ico/mmc4w.png"	# use default image
-    aart = Image.open( thisimage ) 	# the URL of the image for the radio station
-    aart = aart.resize((artwinilist[0],artwinilist[1]))
+    if isinstance(thisimage, (bytes, bytearray)):
+        # artwork in memory (only if it couldn't be saved in the cache)
+        key = (hashlib.sha1(thisimage).hexdigest(), artwinilist[0], artwinilist[1])
+        source = io.BytesIO(thisimage)
+        description = f"artwork in memory ({len(thisimage)} bytes)"
+    else:
+        key = (str(thisimage), artwinilist[0], artwinilist[1])
+        source = thisimage
+        description = str(thisimage)[-60:]	# only the end of long filenames
+    aart = photoCacheGet(key)
+    if aart is not None:
+        return aart			# already decoded and resized
+    aart = resizeArt( source, description )
     aart = ImageTk.PhotoImage(aart)
     aart.image = aart  # required for some reason
+    photoCachePut(key, aart)
     return aart
 
 
-def artWindowRadio(thisimage):
-#    logger.debug(f"artWindowRadio({thisimage}) called  ")
-    if thisimage == '':
-        thisimage = path_to_dat / "ico/mmc4w.png"	# use default image
-
-    aart = display_image_from_url(thisimage)
-    aart = aart.resize((artwinilist[0],artwinilist[1]))
-    aart = ImageTk.PhotoImage(aart)
+def artWindowRadio(url, image):
+    # image was downloaded and resized by fetchRadioArt
+    if image is None:
+        return artWindow('')		# use default image
+    aart = ImageTk.PhotoImage(image)
     aart.image = aart  # required for some reason
+    photoCachePut((url, artwinilist[0], artwinilist[1]), aart)
     return aart
 
 
-# Define function to fetch images from url and exception handling
-def display_image_from_url(url):
-    aart = ''
-    try:
-        with urllib.request.urlopen(url) as u:
-            raw_data = u.read()
-    except Exception as e:
-        logger.debug(f"Error '{e}' fetching image: {url}")
-        return
+#
+#	resizeArt opens an image (filename or file object) and returns it 
+#	resized to the artimage size.
+#	A JPEG at least twice the size we want is decoded with draft(), 
+#	which makes the JPEG decoder itself scale down by 1/2, 1/4 or 1/8 -
+#	much quicker than decoding every pixel of a big scan on the Pi.
+#	Then the resize filter is chosen by how much scaling is left to do:
+#	   enlarging			BICUBIC
+#	   shrinking up to half		LANCZOS (best quality)
+#	   shrinking more than that	LANCZOS, after a quick reduce() by
+#					a whole number (reducing_gap)
+#
+resampling = getattr(Image, 'Resampling', Image)	# PIL 9.1 moved the filter names
+
+def resizeArt(source, description):
+    width, height = artwinilist[0], artwinilist[1]
+    started = time.monotonic()
+    image = Image.open(source)
+    imageFormat = image.format
+    originalSize = image.size
+    drafted = False
+    if imageFormat == 'JPEG' and image.width >= 2 * width and image.height >= 2 * height:
+        image.draft('RGB', (width, height))	# decoder scales down, never below (width, height)
+        drafted = True
+    image.load()
+    decoded = time.monotonic()
+
+    scale = min(width / image.width, height / image.height)
+    if image.size == (width, height):
+        filterName = 'none'
+    elif scale > 1:
+        filterName = 'BICUBIC'
+        image = image.resize((width, height), resampling.BICUBIC)
+    elif scale >= 0.5:
+        filterName = 'LANCZOS'
+        image = image.resize((width, height), resampling.LANCZOS)
+    else:
+        filterName = 'LANCZOS+reduce'
+        image = image.resize((width, height), resampling.LANCZOS, reducing_gap=2.0)
+    logger.debug(f"resizeArt  {description}: {imageFormat} {originalSize[0]}x{originalSize[1]}"
+                 f" decoded{' (draft)' if drafted else ''} in {(decoded - started) * 1000:.0f} ms,"
+                 f" resized ({filterName}) in {(time.monotonic() - decoded) * 1000:.0f} ms")
+    return image
 
-    try:
-        aart = Image.open(io.BytesIO(raw_data))
-    except Exception as e:
-        logger.debug(f"Error '{e}' opening image: {url}")
-        return
 
+#
+#	photoCache keeps the most recently displayed artwork as PhotoImages,
+#	ready to put straight on the screen.  Key is (source, width, height),
+#	where source is the filename or URL of the image.
+#	Oldest images are dropped when they total more than memcache bytes.
+#	Only use it from TKinter's thread.
+#
+photoCache = OrderedDict()	# key : PhotoImage, least recently used first
+photoCacheBytes = 0
+photoCacheLimit = int(confparse.get('artwork','memcache', fallback='16777216'))
+
+def photoCacheGet(key):
+    aart = photoCache.get(key)
+    if aart is not None:
+        photoCache.move_to_end(key)	# now the most recently used
     return aart
 
 
+def photoCachePut(key, aart):
+    global photoCacheBytes
+    if key in photoCache:
+        photoCacheBytes -= photoCacheSize(photoCache.pop(key))
+    photoCache[key] = aart
+    photoCacheBytes += photoCacheSize(aart)
+    while photoCacheBytes > photoCacheLimit and len(photoCache) > 1:
+        oldKey, oldAart = photoCache.popitem(last=False)
+        photoCacheBytes -= photoCacheSize(oldAart)
+        logger.debug(f"photoCachePut  dropped {oldKey[0]}")
+
+
+def photoCacheSize(aart):
+    return aart.width() * aart.height() * 4	# TKinter keeps 4 bytes per pixel
+
 
 def getaartpic(currSong):		# get the album artwork for currSong
 #    global aartvar, currSong
@@ -786,51 +1938,37 @@ def getaartpic(currSong):		# get the album artwork for currSong
     #	1) use MPD readpicture to check for an image embedded in the song file 
     #	2) use MPD albumart to check the directory for cover.png, cover.jpg, or cover.webp
     #	3) look in directory for folder.jpg, and in parent folder for folder.jpg
-    # In the first 2 cases, the image is copied to cover.png for display
+    # In the first 2 cases, the image is returned as a bytearray in memory
     #
-    logger.debug(f"getaartpic() called.  currSong['file']={currSong['file']}")
+    logger.debug(f"getaartpic() called.  currSong.file={currSong.file}")
     eadict = {}
     fadict = {}
     #
     # 1) readpicture looks for a picture embedded in the song file
     #
 #    eadict = client.readpicture(cs['file'],0)
-    eadict = client.readpicture(currSong['file'],0)
+    started = time.monotonic()
+    try:
+        eadict = MPD('readpicture',currSong.file,0)
+    except musicpd.CommandError as e:
+        logger.debug(f"readpicture  {currSong.file}: {e}")	# eg an unsupported file type
+        eadict = {}
     if len(eadict) > 0:
-        size = int(eadict['size'])
-        done = int(eadict['binary'])
-        logger.debug(f"readpicture found.  size={size}, done={done}.")
-        with open(path_to_dat / "cover.png", 'wb') as cover:
-            cover.write(eadict['data'])
-            while size > done:
-                eadict = client.readpicture(currSong['file'],done)
-                done += int(eadict['binary'])
-                cover.write(eadict['data'])
-        logger.debug(f"D6| Wrote {done} bytes to cover.png.  len(eadict) is: {len(eadict)}.")
-#        aartvar = path_to_dat / "cover.png"
-        return path_to_dat / "cover.png"
+        logger.debug(f"readpicture found.  size={eadict['size']}, done={eadict['binary']}.")
+        return readArtChunks(eadict, 'readpicture', currSong.file, started)
     else:
         #
         # 2) # albumart searches the directory the file resides in 
 	#	for a file called cover.png, cover.jpg, or cover.webp
         #
         try:
-            fadict = client.albumart(currSong['file'],0)
+            started = time.monotonic()
+            fadict = MPD('albumart',currSong.file,0)
             logger.debug(f"albumart  len(fadict)={len(fadict)}.")
             # albumart did find the file
             if len(fadict) > 0:
-                received = int(fadict.get('binary'))
-                size = int(fadict.get('size'))
-                logger.debug(f"albumart found.  size={size}, done={received}.")
-                with open(path_to_dat / "cover.png", 'wb') as cover:
-                    cover.write(fadict.get('data'))
-                    while received < size:
-                        fadict = client.albumart(currSong['file'], received)
-                        cover.write(fadict.get('data'))
-                        received += int(fadict.get('binary'))
-                logger.debug(f"D6| Wrote {received} bytes to cover.png.  len(fadict) is: {len(fadict)}.")
-#                aartvar = path_to_dat / "cover.png"
-                return path_to_dat / "cover.png"
+                logger.debug(f"albumart found.  size={fadict.get('size')}, done={fadict.get('binary')}.")
+                return readArtChunks(fadict, 'albumart', currSong.file, started)
             else:
                 logger.debug(f"albumart else   len(fadict)={len(fadict)}.  ")
 #                aartvar = ''
@@ -842,7 +1980,7 @@ def getaartpic(currSong):		# get the album artwork for currSong
             #
             logger.debug(f"no embedded picture and no albumart.  try looking for folder.jpg")
             aartvar = ''
-            tempSong = currSong['file']
+            tempSong = currSong.file
 
             tempSong = parentFolder(tempSong)		# trim off the last part of filename
             aartvar = find_file( tempSong, "folder.jpg" )
@@ -855,6 +1993,463 @@ def getaartpic(currSong):		# get the album artwork for currSong
     logger.info(f"D6| Bottom of getaartpic().  aartvar={aartvar}, len(eadict)={len(eadict)}, len(fadict)={len(fadict)}.")
 
 
+#########################################################################
+#									#
+#		Album artwork cache on disk				#
+#									#
+#########################################################################
+#
+#	Artwork found by getaartpic() is resized to the artimage size and 
+#	saved in the cache directory, named by a hash of the song's folder.
+#	So all the tracks of an album share one file, and the artwork is 
+#	only fetched from MPD once, even after KitchenPlayer restarts.
+#	Each time a file is used its modification time is updated; when the
+#	cache grows past cachesize MB the least recently used files go.
+#	An album with no artwork gets an empty <key>.none file instead, so 
+#	its other tracks don't look again until it is missttl seconds old.
+#
+artCacheDir = path_to_dat / confparse.get('artwork','cachedir', fallback='artcache')
+artCacheLimit = int(float(confparse.get('artwork','cachesize', fallback='50')) * 1024 * 1024)
+artMissTTL = float(confparse.get('artwork','missttl', fallback='86400'))	# seconds
+artCacheDir.mkdir(exist_ok=True)
+
+def artCacheKey(songFile):
+    # all the songs in one folder share the same artwork.  
+    #	The size is included, so changing artimage doesn't show old sizes
+    key = f"{parentFolder(songFile)}|{artwinilist[0]}x{artwinilist[1]}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def artCacheGet(key):
+    # return the cached artwork file for key, or '' if not cached
+    filename = artCacheDir / (key + ".jpg")
+    try:
+        os.utime(filename)		# mark it as recently used
+    except OSError:
+        return ''
+    logger.debug(f"artCacheGet  found {filename}")
+    return filename
+
+
+def artCacheMissing(key):
+    # True if we looked for this album's artwork recently, and there wasn't any
+    try:
+        return time.time() - os.stat(artCacheDir / (key + ".none")).st_mtime < artMissTTL
+    except OSError:
+        return False
+
+
+def artCacheStoreMiss(key):
+    try:
+        (artCacheDir / (key + ".none")).touch()
+    except OSError as e:
+        logger.debug(f"artCacheStoreMiss  cannot mark key {key}: {e}")
+
+
+def artCacheStore(key, source, trim=True):
+    # save a resized copy of the source image in the cache, and return its filename
+    # source is a filename, or a bytearray from readArtChunks
+    filename = artCacheDir / (key + ".jpg")
+    tempname = None
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            image = resizeArt(io.BytesIO(source), f"artwork for key {key}")
+        else:
+            image = resizeArt(source, f"artwork for key {key}")
+        image = image.convert('RGB')
+        # a temporary file of our own - another thread or --index-art 
+        #	may be saving the same album at the same moment
+        tempfd, tempname = tempfile.mkstemp(suffix=".tmp", dir=artCacheDir)
+        with os.fdopen(tempfd, 'wb') as f:
+            image.save(f, 'JPEG', quality=90)
+        os.replace(tempname, filename)	# never leave a half written file in the cache
+    except Exception as e:
+        logger.info(f"artCacheStore  cannot cache artwork for key {key}: {e}")
+        if tempname is not None and os.path.exists(tempname):
+            os.remove(tempname)
+        return source			# just display the original
+    logger.debug(f"artCacheStore  saved artwork as {filename}")
+    if trim:
+        artCacheTrim()
+    return filename
+
+
+def artCacheTrim():
+    # delete least recently used artwork until the cache is back under its limit.
+    #	Only the .jpg and .none files - index.json and streams.json live here too
+    files = []
+    for entry in os.scandir(artCacheDir):
+        if entry.is_file() and entry.name.endswith((".jpg", ".none")):
+            info = entry.stat()
+            files.append((info.st_mtime, info.st_size, entry.path))
+    total = sum(size for mtime, size, path in files)
+    if total <= artCacheLimit:
+        return
+    files.sort()			# oldest first
+    for mtime, size, path in files:
+        try:
+            os.remove(path)
+            total -= size
+        except OSError as e:
+            logger.debug(f"artCacheTrim  cannot remove {path}: {e}")
+        if total <= artCacheLimit * 0.9:	# leave some room, so we don't trim every time
+            break
+    logger.debug(f"artCacheTrim  cache trimmed to {total} bytes")
+
+
+
+#
+# readArtChunks collects the rest of the artwork from readpicture or 
+#	albumart, into one buffer allocated at the size MPD gave in its 
+#	first answer.  Nothing is written to disk.
+#	started is when the first chunk was asked for, to time the transfer.
+#
+def readArtChunks(firstChunk, mpdFunction, songFile, started):
+    size = int(firstChunk['size'])
+    chunks = 1
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    done = int(firstChunk['binary'])
+    view[:done] = firstChunk['data']
+    while done < size:
+        chunk = MPD(mpdFunction, songFile, done)
+        received = int(chunk['binary'])
+        if received == 0:
+            break				# shouldn't happen, but don't loop forever
+        view[done:done+received] = chunk['data']
+        done += received
+        chunks += 1
+    logger.info(f"artwork {mpdFunction} read {done} of {size} bytes in {chunks} chunks, {(time.monotonic() - started) * 1000:.0f} ms.  {songFile}")
+    return buffer
+
+
+#########################################################################
+#									#
+#		Radio station artwork cache				#
+#									#
+#########################################################################
+#
+#	Station artwork is downloaded from the stream_Art URL, resized and
+#	saved in the 'radio' folder of the artwork cache, with a small .json 
+#	file remembering when it was fetched and the server's ETag and 
+#	Last-Modified headers.  
+#	For radiottl seconds the cached copy is simply used.  After that the
+#	cached copy is displayed straight away while we ask the server 
+#	whether it has changed (a conditional request, so an unchanged logo 
+#	costs a '304 Not Modified' rather than the whole image).
+#	These functions run in the background, never on TKinter's thread.
+#	A station button and the prewarm pool may ask for the same URL at 
+#	once, so each URL has a lock: the second one waits, then finds the
+#	fresh copy the first one saved.
+#	radioFetched tells showRadioArt when each URL was last checked, so
+#	a logo kept in photoCache for days still gets checked after radiottl.
+#
+radioCacheDir = artCacheDir / "radio"
+radioCacheDir.mkdir(exist_ok=True)
+radioArtTTL = float(confparse.get('artwork','radiottl', fallback='86400'))	# seconds
+radioArtTimeout = float(confparse.get('artwork','radiotimeout', fallback='5'))	# seconds
+radioFetchLocks = {}		# url : threading.Lock
+radioFetchLocksLock = threading.Lock()
+radioFetched = {}		# url : time.time() the artwork was last downloaded or checked
+
+def fetchRadioArt(url):			# runs in the background
+    with radioFetchLocksLock:
+        urlLock = radioFetchLocks.setdefault(url, threading.Lock())
+    with urlLock:
+        return fetchRadioArtLocked(url)
+
+
+def fetchRadioArtLocked(url):
+    key = hashlib.sha1(f"{url}|{artwinilist[0]}x{artwinilist[1]}".encode('utf-8')).hexdigest()
+    imageFile = radioCacheDir / (key + ".png")
+    metaFile = radioCacheDir / (key + ".json")
+    cached = radioCacheLoad(imageFile)
+    meta = {}
+    if cached is not None:
+        try:
+            with open(metaFile) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        if time.time() - meta.get('fetched', 0) < radioArtTTL:
+            radioFetched[url] = meta.get('fetched', 0)
+            return url, cached		# still fresh
+        runOnTk(showRadioArtDone, (url, cached))	# show the old one while we check
+
+    #
+    # download the artwork, or ask whether our copy is still current
+    #
+    request = urllib.request.Request(url, headers={'User-Agent': programName})
+    if cached is not None:
+        if meta.get('etag'):
+            request.add_header('If-None-Match', meta['etag'])
+        if meta.get('lastmodified'):
+            request.add_header('If-Modified-Since', meta['lastmodified'])
+    started = time.monotonic()
+    try:
+        with urllib.request.urlopen(request, timeout=radioArtTimeout) as u:
+            raw_data = u.read()
+            headers = u.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached is not None:
+            logger.debug(f"fetchRadioArt  not modified ({(time.monotonic() - started) * 1000:.0f} ms): {url}")
+            meta['fetched'] = radioFetched[url] = time.time()
+            radioCacheSaveMeta(metaFile, meta)
+        else:
+            logger.debug(f"Error '{e}' fetching image: {url}")
+        return url, cached
+    except Exception as e:
+        logger.debug(f"Error '{e}' fetching image: {url}")
+        return url, cached		# keep using the old one (if any)
+    logger.debug(f"fetchRadioArt  downloaded {len(raw_data)} bytes in {(time.monotonic() - started) * 1000:.0f} ms: {url}")
+
+    tempFile = None
+    try:
+        aart = resizeArt(io.BytesIO(raw_data), url)
+        tempfd, tempFile = tempfile.mkstemp(suffix=".tmp", dir=radioCacheDir)
+        with os.fdopen(tempfd, 'wb') as f:
+            aart.save(f, 'PNG')
+        os.replace(tempFile, imageFile)
+    except Exception as e:
+        logger.debug(f"Error '{e}' opening image: {url}")
+        if tempFile is not None and os.path.exists(tempFile):
+            os.remove(tempFile)
+        return url, cached
+    radioFetched[url] = time.time()
+    radioCacheSaveMeta(metaFile, {'url': url, 'fetched': radioFetched[url],
+                                  'etag': headers.get('ETag', ''),
+                                  'lastmodified': headers.get('Last-Modified', '')})
+    return url, aart
+
+
+#
+#	prewarmRadioArt is a task run once, after the window first appears.
+#	It fetches every station's artwork, and finds where each station's
+#	stream_URL leads, on its own small pool of threads (so station
+#	buttons pressed meanwhile are not kept waiting).
+#	So we don't hit one web server too hard, each server has a queue:
+#	only prewarmperhost of its jobs are given to the pool at once, and
+#	the next is only handed over when one finishes - so the pool's
+#	threads are never sat waiting for a busy server while jobs for
+#	other servers queue up behind them.
+#	prewarmDone turns each picture into a PhotoImage in photoCache.
+#
+prewarmPool = ThreadPoolExecutor(max_workers=int(confparse.get('artwork','prewarmthreads', fallback='4')), thread_name_prefix="prewarm")
+prewarmPerHost = int(confparse.get('artwork','prewarmperhost', fallback='2'))
+prewarmHosts = {}		# host name : [jobs in the pool, deque of jobs waiting]
+prewarmHostsLock = threading.Lock()
+
+def prewarmRadioArt():
+    for url in set(playlistArt.values()):
+        if url == '' or photoCacheGet((url, artwinilist[0], artwinilist[1])) is not None:
+            continue
+        prewarmSubmit(fetchRadioArt, url, prewarmDone)
+    # and find where each station's stream_URL leads, ready for when it is pressed
+    for name, btnType in playlistType.items():
+        if btnType == 'stream':
+            prewarmSubmit(resolveStreamOnce, playlistURL[name], None)
+    logger.debug(f"prewarmRadioArt  fetching artwork and streams from {len(prewarmHosts)} web servers")
+
+
+def prewarmSubmit(job, url, callback):
+    host = urllib.parse.urlsplit(url).hostname
+    with prewarmHostsLock:
+        hostJobs = prewarmHosts.setdefault(host, [0, deque()])
+        if hostJobs[0] >= prewarmPerHost:
+            hostJobs[1].append((job, url, callback))	# wait for one of this server's jobs to finish
+            return
+        hostJobs[0] += 1
+    prewarmStart(host, job, url, callback)
+
+
+def prewarmStart(host, job, url, callback):
+    future = prewarmPool.submit(job, url)
+    future.add_done_callback(lambda future: prewarmFinished(future, host, job, callback))
+
+
+def prewarmFinished(future, host, job, callback):	# runs on the prewarm pool
+    backgroundDone(future, job, callback)
+    with prewarmHostsLock:
+        hostJobs = prewarmHosts[host]
+        if hostJobs[1]:
+            nextJob = hostJobs[1].popleft()	# same number running, so no change to the count
+        else:
+            hostJobs[0] -= 1
+            nextJob = None
+    if nextJob is not None:
+        prewarmStart(host, *nextJob)
+
+
+def prewarmDone(result):
+    url, image = result
+    if image is not None:
+        artWindowRadio(url, image)	# puts it in photoCache
+
+
+def radioCacheLoad(imageFile):
+    # return the cached image, or None
+    try:
+        aart = Image.open(imageFile)
+        aart.load()			# read it now, not when TKinter gets it
+        return aart
+    except (OSError, ValueError):
+        return None
+
+
+def radioCacheSaveMeta(metaFile, meta):
+    try:
+        tempfd, tempFile = tempfile.mkstemp(suffix=".tmp", dir=radioCacheDir)
+        with os.fdopen(tempfd, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tempFile, metaFile)
+    except OSError as e:
+        logger.debug(f"radioCacheSaveMeta  cannot save {metaFile}: {e}")
+
+
+
+#########################################################################
+#									#
+#		Radio stream address cache				#
+#									#
+#########################################################################
+#
+#	Some stream_URLs are not the stream itself, but a .pls or .m3u 
+#	playlist, an HLS master playlist listing the variants, or a 
+#	redirect - and MPD has to follow them every time the station is
+#	loaded, which can take seconds.  resolveStream() follows them once,
+#	and remembers where they led in streams.json in the artwork cache, 
+#	with how long it took (so we can see which stations are slow).
+#	After streamttl seconds it is resolved again, since redirects often
+#	lead to addresses which expire.  A station which can't be resolved
+#	(eg its server is down, or answers 'ICY 200 OK' which urllib 
+#	rejects) is remembered the same way, so MPD gets the original URL
+#	straight away until streamttl has passed.
+#	loadplaylistJob uses streamAddress(), which never waits: if the 
+#	address isn't known yet MPD gets the original URL this time, and 
+#	resolveStreamOnce() runs on the background pool for next time.
+#	The prewarm pool uses resolveStreamOnce() too, so a URL is never
+#	being resolved twice at once.
+#	Runs on the MPD worker thread, background and prewarm pools, hence the lock.
+#
+streamCacheFile = artCacheDir / "streams.json"
+streamTTL = float(confparse.get('basic','streamttl', fallback='3600'))		# seconds
+streamTimeout = float(confparse.get('basic','streamtimeout', fallback='5'))	# seconds
+streamCacheLock = threading.Lock()
+playlistTypes = ('audio/x-scpls', 'audio/x-mpegurl', 'audio/mpegurl', 'application/x-mpegurl', 
+                 'application/vnd.apple.mpegurl')
+
+def streamCacheLoad():
+    try:
+        with open(streamCacheFile) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+streamCache = streamCacheLoad()		# stream_URL : {'resolved', 'fetched', 'seconds', 'error'}
+streamResolving = set()			# stream_URLs being resolved in the background
+
+
+def streamAddress(url):
+    # the address to give MPD now, without waiting for the network
+    with streamCacheLock:
+        entry = streamCache.get(url)
+        if entry is not None and time.time() - entry['fetched'] < streamTTL:
+            return entry['resolved']
+        resolving = url in streamResolving
+    if not resolving:
+        backgroundSubmit(resolveStreamOnce, url)
+    return url
+
+
+def resolveStreamOnce(url):		# runs on the background or prewarm pool
+    with streamCacheLock:
+        if url in streamResolving:
+            return			# another thread is already resolving it
+        streamResolving.add(url)
+    try:
+        resolveStream(url)
+    finally:
+        with streamCacheLock:
+            streamResolving.discard(url)
+
+
+def resolveStream(url):
+    # return the address MPD should play for url
+    with streamCacheLock:
+        entry = streamCache.get(url)
+    if entry is not None and time.time() - entry['fetched'] < streamTTL:
+        return entry['resolved']
+    started = time.monotonic()
+    error = ''
+    try:
+        resolved = resolveStreamURL(url, 3)
+    except Exception as e:
+        logger.info(f"resolveStream  cannot resolve {url} ({time.monotonic() - started:.2f} sec), MPD can try it: {e}")
+        resolved, error = url, str(e)	# remember that, so we don't keep trying
+    seconds = time.monotonic() - started
+    if error == '':
+        logger.info(f"resolveStream  {seconds:.2f} sec to resolve {url}" + ("" if resolved == url else f" -> {resolved}"))
+    with streamCacheLock:
+        streamCache[url] = {'resolved': resolved, 'fetched': time.time(), 'seconds': round(seconds, 3), 'error': error}
+        streamCacheSave()
+    return resolved
+
+
+def resolveStreamURL(url, depth):
+    # follow redirects, and look inside playlists, until we get to the stream
+    request = urllib.request.Request(url, headers={'User-Agent': programName})
+    with urllib.request.urlopen(request, timeout=streamTimeout) as u:
+        finalURL = u.geturl()		# after any redirects
+        contentType = u.headers.get_content_type()
+        extension = os.path.splitext(urllib.parse.urlsplit(finalURL).path)[1].lower()
+        if contentType not in playlistTypes and extension not in ('.pls', '.m3u', '.m3u8'):
+            return finalURL		# the stream itself - don't read any of it
+        text = u.read(65536).decode('utf-8', errors='replace')
+    lines = [line.strip() for line in text.splitlines() if line.strip() != '']
+
+    if contentType == 'audio/x-scpls' or extension == '.pls':
+        # [playlist]  File1=http://...
+        entries = [line.split('=', 1)[1] for line in lines if line.lower().startswith('file1=')]
+    elif any(line.startswith('#EXT-X-STREAM-INF') for line in lines):
+        # HLS master playlist - play the first variant
+        entries = [line for prev, line in zip(lines, lines[1:]) 
+                   if prev.startswith('#EXT-X-STREAM-INF') and not line.startswith('#')]
+    elif any(line.startswith(('#EXTINF', '#EXT-X-TARGETDURATION')) for line in lines) and extension == '.m3u8':
+        return finalURL			# HLS media playlist - MPD plays it as it is
+    else:
+        # plain .m3u - the first address in it
+        entries = [line for line in lines if not line.startswith('#')]
+    if not entries:
+        raise ValueError("no stream address in the playlist")
+    nextURL = urllib.parse.urljoin(finalURL, entries[0])
+    if depth <= 1:
+        return nextURL
+    # the entry may itself redirect, or be another playlist
+    try:
+        return resolveStreamURL(nextURL, depth - 1)
+    except Exception as e:
+        logger.debug(f"resolveStreamURL  cannot follow {nextURL}, using it as it is: {e}")
+        return nextURL
+
+
+def forgetStream(url):
+    # MPD couldn't play where url led, so resolve it again next time
+    with streamCacheLock:
+        if streamCache.pop(url, None) is not None:
+            streamCacheSave()
+
+
+def streamCacheSave():			# call with streamCacheLock held
+    try:
+        tempFile = streamCacheFile.with_suffix(".tmp")
+        with open(tempFile, 'w') as f:
+            json.dump(streamCache, f, indent=1)
+        os.replace(tempFile, streamCacheFile)
+    except OSError as e:
+        logger.debug(f"streamCacheSave  cannot save {streamCacheFile}: {e}")
+
+
+
 #
 # return the parent folder of the given filename. 
 #	if a path is given, return parent path
@@ -874,19 +2469,62 @@ def find_file(folder, filename):
     # does the MPD music filename exist in the supplied folder ?
     if folder != '':
         folder = folder + slash
-    filename = MPD_music_directory + slash + folder + filename
-    try:
-        f = open(filename, 'r')		# open to read
+    # look in the cached list of the folder's files, rather than 
+    #	opening the file on the (slow) network share each time
+    names = listFolder(MPD_music_directory + slash + folder)
+    if filename.lower() in names:
+        filename = MPD_music_directory + slash + folder + names[filename.lower()]
         # file exists, so dispplay it
         logger.debug(f"   find_file found {filename}.")
-        f.close()			# don't leave masses of open files
-# or should use        temp = os.path.isfile( filename)
         return filename		# it exists, so dislay
-    except:
-        logger.debug(f"   find_file '{filename}' not found") 
+    else:
+        logger.debug(f"   find_file '{folder}{filename}' not found") 
         return ''
 
 
+#
+#	dirCache remembers the files in each folder we have looked in, and 
+#	that a folder has no such file is remembered just the same, so 
+#	the other tracks of an album don't have to look again.
+#	For dircachettl seconds the list is used without checking; after 
+#	that the folder's modification time is checked, and the folder only
+#	listed again if it has changed.
+#	Used from several threads (the MPD worker and the background pool),
+#	hence the lock.  Each forked --index-art process gets its own copy
+#	of dirCache, so the lock has nothing to share between processes.
+#
+dirCache = {}			# folder : (time to check again, folder mtime, {lower case name: name})
+dirCacheLock = threading.Lock()
+dirCacheTTL = float(confparse.get('artwork','dircachettl', fallback='600'))	# seconds
+dirCacheMax = 5000		# folders - about 3 times the albums in my collection
+
+def listFolder(path):
+    now = time.monotonic()
+    with dirCacheLock:
+        entry = dirCache.get(path)
+    if entry is not None and now < entry[0]:
+        return entry[2]			# recently checked
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        mtime = None			# folder doesn't exist
+    if entry is not None and mtime == entry[1]:
+        names = entry[2]		# folder hasn't changed
+    elif mtime is None:
+        names = {}
+    else:
+        try:
+            names = {entry.name.lower(): entry.name for entry in os.scandir(path)}
+        except OSError as e:
+            logger.debug(f"listFolder  cannot list {path}: {e}")
+            names = {}
+    with dirCacheLock:
+        if len(dirCache) >= dirCacheMax:
+            dirCache.clear()		# simplest way to stop it growing forever
+        dirCache[path] = (now + dirCacheTTL, mtime, names)
+    return names
+
+
 def getFilenameDetail(filename):
     # Can we work out what is missing from filename ?
 
@@ -913,6 +2551,175 @@ def getFilenameDetail(filename):
     if fnamTitle != '':     filename_parts[ "title"]     = fnamTitle
     return filename_parts
 
+#########################################################################
+#									#
+#	--index-art  fill the artwork cache for the music library	#
+#									#
+#########################################################################
+#
+#	Run overnight (eg from cron) so artwork never has to be fetched 
+#	from MPD while music is playing.
+#	Each folder containing music is looked at once: artwork is found the
+#	same way getaartpic() does (embedded, cover.*, then folder.jpg) and a
+#	resized copy saved in the artwork cache.  Folders are shared out to 
+#	a pool of processes, each with its own connection to MPD.
+#	index.json in the cache remembers each folder's modification time, 
+#	so the next run skips folders which haven't changed - and if a run
+#	is stopped part way, the next one carries on where it left off.
+#
+artIndexFile = artCacheDir / "index.json"
+musicExtensions = ('.mp3', '.flac', '.ogg', '.oga', '.opus', '.m4a', '.aac', '.wma',
+                   '.wav', '.aif', '.aiff', '.ape', '.mpc', '.wv', '.dsf', '.avi')
+
+def runArtIndexer(playlist, processes):
+    started = time.monotonic()
+    state = artIndexLoad()
+    if playlist == '':
+        folders = artIndexLibrary()
+        print(f"{len(folders)} music folders in {MPD_music_directory}")
+    else:
+        folders = artIndexPlaylist(playlist)
+        print(f"{len(folders)} music folders in playlist {playlist}")
+
+    #
+    # only look at folders which are new, or have changed since last time
+    #
+    todo = []
+    for folder, songFile in folders.items():
+        try:
+            mtime = os.stat(MPD_music_directory + slash + folder).st_mtime
+        except OSError:
+            mtime = 0
+        done = state.get(folder)
+        # (just check the artwork is still there - artCacheGet would mark it as used)
+        if done is not None and done[0] == mtime and (not done[1] or (artCacheDir / (artCacheKey(songFile) + ".jpg")).exists()):
+            continue
+        todo.append((folder, songFile, mtime))
+    print(f"{len(folders) - len(todo)} folders unchanged, {len(todo)} to index using {processes} processes")
+    logger.info(f"--index-art  {len(todo)} of {len(folders)} folders to index")
+
+    found = 0
+    for count, (folder, mtime, hasArt) in enumerate(artIndexRun(todo, processes), 1):
+        if hasArt is None:
+            continue			# failed - try again next time
+        found += hasArt
+        state[folder] = [mtime, hasArt]
+        if count % 50 == 0:
+            artIndexSave(state)		# so a stopped run doesn't lose much
+            print(f"  {count} of {len(todo)} folders done")
+    artIndexSave(state)
+    # don't trim the cache - that would just delete artwork we have indexed.
+    #	Instead say if cachesize is too small to hold it all
+    cacheSize = sum(entry.stat().st_size for entry in os.scandir(artCacheDir) if entry.name.endswith(".jpg"))
+    if cacheSize > artCacheLimit:
+        print(f"WARNING: the artwork cache is now {cacheSize / 1048576:.0f} MB, more than cachesize "
+              f"{artCacheLimit / 1048576:.0f} MB.  KitchenPlayer will delete the least recently used "
+              f"artwork - raise cachesize in the [artwork] section to keep it all.")
+        logger.warning(f"--index-art  artwork cache {cacheSize} bytes is over cachesize {artCacheLimit} bytes")
+    print(f"Found artwork for {found} of {len(todo)} folders in {time.monotonic() - started:.0f} seconds")
+    logger.info(f"--index-art  found artwork for {found} of {len(todo)} folders in {time.monotonic() - started:.0f} seconds")
+
+
+#
+#	artIndexRun() gives (folder, mtime, hasArt) for each folder as it is 
+#	done, hasArt being None if it failed.  The processes are forked, so 
+#	they share our configuration.  Without fork (Windows) a new process 
+#	would run this whole script again from the top, so there the 
+#	folders are just done one at a time in this process.
+#
+def artIndexRun(todo, processes):
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        print("This system can't fork, so indexing in one process")
+        for folder, songFile, mtime in todo:
+            try:
+                yield folder, mtime, artIndexFolder(songFile)
+            except Exception as e:
+                logger.info(f"--index-art  {folder} failed: {e}")
+                yield folder, mtime, None
+        return
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=artIndexInit) as pool:
+        futures = {pool.submit(artIndexFolder, songFile): (folder, mtime) for folder, songFile, mtime in todo}
+        for future in as_completed(futures):
+            folder, mtime = futures[future]
+            try:
+                yield folder, mtime, future.result()
+            except Exception as e:
+                logger.info(f"--index-art  {folder} failed: {e}")
+                yield folder, mtime, None
+
+
+def artIndexLibrary():
+    # return {folder: first music file in it} for the whole music directory
+    folders = {}
+    for dirpath, dirnames, filenames in os.walk(MPD_music_directory):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(musicExtensions):
+                songFile = os.path.relpath(os.path.join(dirpath, filename), MPD_music_directory)
+                songFile = songFile.replace(os.sep, '/')	# MPD always uses /
+                folders[parentFolder(songFile)] = songFile
+                break
+    return folders
+
+
+def artIndexPlaylist(playlist):
+    # return {folder: first music file in it} for the songs in a stored playlist
+    folders = {}
+    for songFile in MPD('listplaylist', playlist):
+        if '://' not in songFile:		# skip radio streams
+            folders.setdefault(parentFolder(songFile), songFile)
+    return folders
+
+
+def artIndexInit():
+    # runs at the start of each indexing process: it needs its own MPD connection
+    global client, mpdBackend
+    mpdBackend = None
+    client = musicpd.MPDClient()
+    client.connect(serverip, int(serverport))
+    for mpdFunction in list(mpdDispatch):
+        if mpdFunction != 'connect':
+            del mpdDispatch[mpdFunction]	# these belong to the parent's client
+    setBinaryLimit()
+
+
+def artIndexFolder(songFile):		# runs in an indexing process
+    # returns True if artwork was found (and cached)
+    try:
+        aartvar = getaartpic(Song({'file': songFile}))
+    except musicpd.CommandError as e:
+        logger.debug(f"--index-art  {songFile}: {e}")	# eg file not in MPD's database
+        return False
+    if len(aartvar) == 0:
+        artCacheStoreMiss(artCacheKey(songFile))
+        return False
+    # artCacheStore returns the artwork itself if it couldn't be saved.
+    #	Trimming the cache is left until the end of the run
+    return artCacheStore(artCacheKey(songFile), aartvar, trim=False) is not aartvar
+
+
+def artIndexLoad():
+    try:
+        with open(artIndexFile) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def artIndexSave(state):
+    tempFile = artIndexFile.with_suffix(".tmp")
+    with open(tempFile, 'w') as f:
+        json.dump(state, f)
+    os.replace(tempFile, artIndexFile)
+
+
+if args.index_art is not None:
+    runArtIndexer(args.index_art, max(1, args.processes))
+    sys.exit()
+
+
+
 #########################################################################
 #									#
 #		SETUP MAIN TKinter WINDOWS DEFINITIONS			#
@@ -1045,13 +2852,8 @@ for btnListStr in btns:
 
 #
 # display artwork for track, album or station
+#	(artwinilist, the size of the artwork, is read with the configuration)
 #
-#artwinilist = [300, 300]
-artwinilist = cp.getlist('mainwindow','artimage')	# size of the album art image
-artwinilist[0] = int(artwinilist[0]) 		# convert to integers
-artwinilist[1] = int(artwinilist[1])
-#logger.debug(f"integers    artwinilist[0]={artwinilist[0]}, artwinilist[1]={artwinilist[1]}")
-
 aartvar = ''			# aartvar tells us whether or not to display the art window.
 aart = artWindow(aartvar)	# artWindow prepares the image, 'configs' the Label and returns image as well.
 aartLabel = tk.Label(main_frame, image=aart)
@@ -1070,11 +2872,35 @@ window.update()
 #									#
 #########################################################################
 
+#
+#	showText() and showImage() remember what each widget is showing,
+#	and only touch a widget when its contents change.  Most refreshes
+#	change nothing, or just one line; and with no window.update()
+#	TKinter redraws all the changed widgets together when it is idle.
+#
+shownText  = {}			# widget : text it is showing
+shownImage = [aart]		# image currently in aartLabel, from the window setup
+
+def showText(widget, msg):
+    if shownText.get(widget) == msg:
+        return				# already showing that
+    widget.delete("1.0", 'end')
+    widget.insert("1.0", msg)
+    shownText[widget] = msg
+
+
+def showImage(aart):
+    if aart is shownImage[0]:
+        return				# same PhotoImage, nothing to redraw
+    aartLabel.configure(image=aart)
+    shownImage[0] = aart			# also keeps a reference, so TKinter doesn't lose it
+
+
 def volbtncolor(vol_int):  # Provide visual feedback on volume buttons.
     global lastvol, colrVolume, button_volup, button_voldn
 #    logger.debug("volbtncolor({}) called with lastvol={}.".format(vol_int,lastvol) )
     if lastvol != str(vol_int):
-        MPD('setvol',vol_int)
+        mpdSubmit('setvol',vol_int)
         lastvol = str(vol_int)
         updateIni('serverstats','lastvol',lastvol )
     logger.debug('Set volume to {}.'.format(vol_int))
@@ -1083,7 +2909,6 @@ def volbtncolor(vol_int):  # Provide visual feedback on volume buttons.
     upconf = colrVolume[vol_int]
     button_volup.configure(text=upconf[0],bg=upconf[1],fg=upconf[2])
     button_voldn.configure(text=upconf[3],bg=upconf[4],fg=upconf[5])
-    window.update()
 
 
 #
@@ -1105,25 +2930,6 @@ def displaySwitches():
     button_switches.configure(text=msg,bg='gray90')
 
 
-def plupdate():
-    global currPlaylist
-    logger.debug("plupdate() called")
-    cpl = client.listplaylists()
-    if len(cpl) > 0:
-        pl = ""
-        for plv in cpl:
-            pl = plv['playlist'] + "," + pl
-        currPlaylist = confparse.get("serverstats","lastPlaylist")
-        confparse.set("serverstats","playlists",str(pl))
-        if currPlaylist == '':
-            confparse.set('serverstats','lastPlaylist',cpl[0]['playlist'])
-            currPlaylist = 'Select a saved playlist. "Look" menu.' # a backup strategy. 'Joined Server Queue' is primary.
-        with open(iniFilename, 'w') as SLcnf:
-            confparse.write(SLcnf)
-    else:
-        endWithError("No PlayList Found","The MPD server shows no saved playlist.")
-
-
 
 #########################################################################
 #									#
@@ -1140,37 +2946,84 @@ def plupdate():
 def loadplaylist(newPlaylist):
     global currPlaylist, radioBtn, text3
     logger.debug(f"loadplaylist({newPlaylist}) called. currPlaylist={currPlaylist}.")
-    MPD('clear')
     if currPlaylist != "":
         # first return the previous playlist' button to normal
         radioBtn[currPlaylist].configure(bg=colrButton)
+    # the worker thread talks to MPD, then loadplaylistDone updates the buttons
+    mpdSubmit(loadplaylistJob, newPlaylist, callback=loadplaylistDone,
+              onError=lambda e: loadplaylistDone((newPlaylist, {'error': str(e)})))
 
+
+def loadplaylistJob(newPlaylist):		# runs on the MPD worker thread
 #    logger.debug("playlistType={}, playlistURL={}.".format(playlistType, playlistURL ) )
 #    logger.debug(f"playlistType[{newPlaylist}]={playlistType[newPlaylist]}." )
+    #
+    # clear the queue, load the new playlist and start playing, 
+    #	all as one command list
+    #
     if playlistType[newPlaylist] == 'playlist':
-        MPD('load',newPlaylist)		# a static .m3u file already exists
+        loadCommand = ('load',newPlaylist)	# a static .m3u file already exists
     elif playlistType[newPlaylist] == 'stream':
-        #
         # place the stream into the queue, without physically writing it to disk
-        MPD('add',playlistURL[newPlaylist])
-        logger.debug(f"add to queue.  full Playlist={client.playlistinfo()}.")
+        #	(the address it leads to, so MPD doesn't have to follow it)
+        loadCommand = ('add',streamAddress(playlistURL[newPlaylist]))
     else:
         logger.warning(f"Loadplaylist - unexpected playlistType '{playlistType[newPlaylist]}' for playlist '{newPlaylist}'")
+        return newPlaylist, {'error': f"unexpected playlist type '{playlistType[newPlaylist]}'"}
+    try:
+        MPDbatch(('clear',), loadCommand, ('play',))	# MPD pauses when a new playlist loaded
+    except musicpd.CommandError as errvar:
+        # eg the playlist file has been deleted
+        logger.warning(f"Loadplaylist - MPD rejected {loadCommand}: {errvar}")
+        return newPlaylist, {'error': str(errvar)}
 
     #
     # check for a problem with the playlist
     #	could have been deleted, or moved or radio invalid
     #
-    MPD('play')				# MPD pauses when a new playlist loaded
-    time.sleep(2)			# give MPD time to reject this playlist
-					# may need to increase this on slower machines
-    currStatus = client.status()
+    status = waitForPlayer(playTimeout)
+    if 'error' in status and loadCommand[0] == 'add' and loadCommand[1] != playlistURL[newPlaylist]:
+        # the address we resolved didn't work (maybe it has expired), so let MPD try the original
+        logger.info(f"Loadplaylist - {loadCommand[1]} failed ({status['error']}), trying {playlistURL[newPlaylist]}")
+        forgetStream(playlistURL[newPlaylist])
+        try:
+            MPDbatch(('clearerror',), ('clear',), ('add',playlistURL[newPlaylist]), ('play',))
+        except musicpd.CommandError as errvar:
+            logger.warning(f"Loadplaylist - MPD rejected {playlistURL[newPlaylist]}: {errvar}")
+            return newPlaylist, {'error': str(errvar)}
+        status = waitForPlayer(playTimeout)
+    return newPlaylist, status
+
+
+#
+#	wait until MPD has either started playing (the decoder has opened 
+#	the track or stream, so status has 'audio'), or reported an error.
+#	MPDidle wakes us as soon as the player changes; we also check the
+#	status every 1/4 second, since opening a stream is not an event.
+#
+def waitForPlayer(timeout):		# runs on the MPD worker thread
+    started = time.monotonic()
+    while True:
+        status = MPD('status')
+        waited = time.monotonic() - started
+        if 'error' in status or status['state'] == 'stop' or 'audio' in status:
+            logger.debug(f"waitForPlayer  MPD answered in {waited:.2f} sec, state={status['state']}, error={status.get('error','')}")
+            return status
+        if waited >= timeout:
+            logger.info(f"waitForPlayer  MPD has not started playing after {timeout} sec - assume it is OK")
+            return status
+        MPDidle(['player'], min(timeout - waited, 0.25))
+
+
+def loadplaylistDone(result):
+    global currPlaylist, prevSong, songKey
+    newPlaylist, currStatus = result
 #    logger.debug(f"check for 'error' in currStatus={currStatus}")
     if 'error' in currStatus:
         msg = currStatus['error']
         logger.warning(f"MPD ERROR: {msg}.  playlist={currPlaylist}")
         messagebox.showinfo("MPD ERROR",msg)
-        MPD('clear')
+        mpdSubmit('clear')
         currPlaylist = ""
         return				# don't action the error playlist
 
@@ -1193,10 +3046,16 @@ def loadplaylist(newPlaylist):
         button_next.configure( bg='gray90', text="Next >>", command=next)
         button_remove.configure( bg='gray90', text="Remove", command=remove)
 
-    window.update()
-
     updateIni("serverstats","lastPlaylist",newPlaylist )
     currPlaylist = newPlaylist
+    indexQueue()			# names for [Select]
+
+    # status may have been displayed while the playlist was loading,
+    #	so redisplay the song now we know the new playlist type
+    prevSong = None
+    songKey = None			# and fetch it again
+    pendingChanges.update(['player','playlist'])
+    trigger('status', refreshStatus)
 
     logger.debug(f"loadplaylist end   currPlaylist={currPlaylist}.")
 
@@ -1207,42 +3066,103 @@ def loadplaylist(newPlaylist):
 #
 def displaytrack():
     global window, text1, text2, currSong
-    logger.debug(f"displaytrack() called. len(currSong)={len(currSong)}" )
+    logger.debug(f"displaytrack() called. currSong={currSong}" )
     msg1 = ""
     msg2 = ""
 
-    if len(currSong) == 0:
+    if not currSong:
         displayError("-- no track selected.  Choose a playlist --","")
         return
 
-    if "title" in currSong:
-        msg1 = currSong["title"]
-    if "artist" in currSong:
-        msg1 += " - "+ currSong["artist"]
+    if currSong.title:
+        msg1 = currSong.title
+    if currSong.artist:
+        msg1 += " - "+ currSong.artist
 #    logger.debug('displaytrack()  msg1={}, currSong["title"]={}, currSong["artist"]={}, currSong["album"]={}'.format( msg1, currSong["title"], currSong["artist"], currSong['album'] ) )
 #    logger.debug('displaytrack()  msg1={}, currSong={}.'.format( msg1, currSong ) )
     # display now-playing track information or error message
-    text1.delete("1.0", 'end')
-    text1.insert("1.0", msg1)
+    showText(text1, msg1)
 
     # second line is Album & track
-    if 'album' in currSong:
-        msg2 = currSong['album']
-        if 'track' in currSong:
-            msg2 += f" (track {currSong['track'].zfill(2)})"
+    if currSong.album:
+        msg2 = currSong.album
+        if currSong.track is not None:
+            msg2 += f" (track {currSong.track:02d})"
     else:
         msg2 = "-- no album --"
-    text2.delete("1.0", 'end')
-    text2.insert("1.0", msg2)
+    showText(text2, msg2)
 
     #
-    # load artwork for the current track
+    # load artwork for the current track as a separate task, so the
+    #	track details are displayed without waiting for it
     #
-    aartvar = getaartpic(currSong)	# get artwork for currSong
+    if prefetched['file'] == currSong.file and prefetched['art'] is not None:
+        showTrackArtDone((prefetched['file'], prefetched['art']))	# already fetched
+    else:
+        trigger('artwork', showTrackArt)
+    logger.debug(f" bottom of displaytrack.  artwork load scheduled.")
+
+
+#
+#	prefetch the next song in the queue while the current one plays.
+#	The details from playlistid are the same as currentsong will 
+#	give us, and prefetchDone puts the artwork in photoCache.
+#
+prefetched = {'id': None, 'song': None, 'file': None, 'art': None}
+
+def prefetchNext():
+    nextID = currStatus.get('nextsongid')
+    if nextID is None or nextID == prefetched['id']:
+        return				# nothing next, or already done
+    prefetched.update({'id': nextID, 'song': None, 'file': None, 'art': None})
+    mpdSubmit(prefetchJob, nextID, callback=prefetchDone, background=True)
+
+
+def prefetchJob(songID):		# runs on the MPD worker thread
+    songs = MPD('playlistid', songID)
+    if not songs:
+        return songID, None, ''
+    song = Song(songs[0])
+    songFile, aartvar = fetchTrackArt(song)
+    return songID, song, aartvar
+
+
+def prefetchDone(result):
+    songID, song, aartvar = result
+    if songID != prefetched['id'] or song is None:
+        return				# queue has moved on since we asked
+    artWindow(aartvar)			# decode it now, so it is ready in photoCache
+    prefetched.update({'song': song, 'file': song.file, 'art': aartvar})
+    logger.debug(f"prefetchDone  next song {song.file}, artwork {aartvar}")
+
+
+def showTrackArt():
+    # the worker thread gets the artwork from MPD, then TKinter displays it
+    # if fetching it fails, show the default artwork rather than the last song's
+    mpdSubmit(fetchTrackArt, currSong, callback=showTrackArtDone, background=True,
+              onError=lambda e, songFile=currSong.file: showTrackArtDone((songFile, '')))
+
+
+def fetchTrackArt(song):
+    # use the cached artwork for this album, or get it from MPD and cache it
+    key = artCacheKey(song.file)
+    aartvar = artCacheGet(key)
+    if aartvar == '' and not artCacheMissing(key):
+        aartvar = getaartpic(song)
+        if len(aartvar) > 0:		# a filename, or artwork in memory
+            aartvar = artCacheStore(key, aartvar)
+        else:
+            artCacheStoreMiss(key)		# so the rest of the album doesn't look again
+    return song.file, aartvar
+
+
+def showTrackArtDone(result):
+    songFile, aartvar = result
+    if songFile != currSong.file:
+        return				# song has changed since we asked
     aart = artWindow(aartvar)		# artWindow prepares the image, 'configs' the Label and returns image as well.
-    aartLabel.configure(image=aart)
-    window.update()
-    logger.debug(f" bottom of displaytrack.  window updated.  aartvar={aartvar}, aart={aart}")
+    showImage(aart)
+    logger.debug(f" bottom of showTrackArtDone.  aartvar={aartvar}, aart={aart}")
 
 
 #
@@ -1253,13 +3173,38 @@ def displayprogress():
     msg = ""
     if 'duration' in currStatus:
         dur = float(currStatus['duration']) 
-        if 'elapsed' in currStatus:
-            elap = float(currStatus['elapsed']) 
-        else: elap = 0
-        msg = f"{int(elap)} of {int(dur)} sec"
+        elap = elapsedNow()
+        msg = f"{int(min(elap, dur))} of {int(dur)} sec"
     # update text3
-    text3.delete("1.0", 'end')
-    text3.insert("1.0", msg)
+    showText(text3, msg)
+
+
+#
+#	elapsedNow() works out the elapsed time from MPD's last status, 
+#	plus the time since we fetched it (if MPD is playing)
+#
+def elapsedNow():
+    if 'elapsed' in currStatus:
+        elap = float(currStatus['elapsed']) 
+    else: elap = 0
+    if currStatus.get('state') == 'play' and 'fetched' in currStatus:
+        elap += time.monotonic() - currStatus['fetched']
+    return elap
+
+
+#
+#	the 'progress' task redraws the elapsed time just after each 
+#	whole second ticks over, without asking MPD
+#
+def scheduleProgress():
+    fraction = elapsedNow() % 1
+    schedule('progress', int((1 - fraction) * 1000) + 10, tickProgress)
+
+
+def tickProgress():
+    if currStatus.get('state') == 'play' and playlistType.get(currPlaylist) == 'playlist':
+        displayprogress()
+        scheduleProgress()
 
 
 #
@@ -1269,35 +3214,50 @@ def displayradio():
     global window, text1, text2, text3		#, currSong
     logger.debug(f"displayradio() called.    playlistName[{currPlaylist}]={playlistName[currPlaylist]}" )
     # display details from the current radio station
-    if "title" in currSong:			# no error mesage,
-        msg = currSong["title"]			# currenly playing song
+    msg = currSong.title			# currenly playing song
 #    elif "title" in currSong:			# no error mesage,
 #        msg = currSong["title"]			# currenly playing song
 #    else:
 #        msg = currPlaylist			# if no station name, use the label
     # display now-playing track information or error message
-    text1.delete("1.0", 'end')
-    text1.insert("1.0", msg)
+    showText(text1, msg)
 
     # second line is name of radio station
-    if "name" in currSong:
-        msg = currSong["name"]		# name of the radio station
-    else: msg = ""
-    text2.delete("1.0", 'end')
-    text2.insert("1.0", msg)
+    msg = currSong.name			# name of the radio station
+    showText(text2, msg)
 
     # update text3
-    text3.delete("1.0", 'end')
+    showText(text3, "")
 #    text3.insert("1.0", playlistName[currPlaylist]	# if no station name, use the label
 
-    aart = ''
-    logger.debug(f"displayradio  loading artwork   playlistArt[{currPlaylist}]={playlistArt[currPlaylist]}")
+    # load the station artwork as a separate task
+    trigger('artwork', showRadioArt)
+    logger.debug(f" bottom of displayradio.  artwork load scheduled.")
+
+
+def showRadioArt():
+    logger.debug(f"showRadioArt  loading artwork   playlistArt[{currPlaylist}]={playlistArt[currPlaylist]}")
     if playlistArt[currPlaylist] != '':
-        # load artwork from playlistArt[newPlaylist]
-        aart = artWindowRadio( playlistArt[currPlaylist] ) 	# the URL of the image for the radio station
-    aartLabel.configure(image=aart)
-    window.update()
-    logger.debug(f" bottom of displayradio.   aartvar={aartvar}, aart={aart}")
+        url = playlistArt[currPlaylist]
+        aart = photoCacheGet((url, artwinilist[0], artwinilist[1]))
+        if aart is not None:
+            showImage(aart)		# shown recently, so no need to download it
+            if time.time() - radioFetched.get(url, 0) < radioArtTTL:
+                return
+            # ... unless it is time to check with the server
+        # download artwork from playlistArt[newPlaylist] in the background
+        backgroundSubmit(fetchRadioArt, playlistArt[currPlaylist], callback=showRadioArtDone)
+    else:
+        showImage('')
+
+
+def showRadioArtDone(result):
+    url, image = result
+    if url != playlistArt.get(currPlaylist):
+        return				# station has changed since we asked
+    aart = artWindowRadio(url, image)
+    showImage(aart)
+    logger.debug(f" bottom of showRadioArtDone.   aart={aart}")
 
 
 
@@ -1305,13 +3265,9 @@ def displayError(msg1, msg2):
     global window, text1, text2, text3		#, currSong
 #    logger.debug("displayradio({},{}) called.".format( msg, currSong ) )
     # if msg1 and/or msg2 are passed in, they are messages to diplay
-    text1.delete("1.0", 'end')
-    text1.insert("1.0", msg1)
-
-    text2.delete("1.0", 'end')
-    text2.insert("1.0", msg2)
-
-    text3.delete("1.0", 'end')
+    showText(text1, msg1)
+    showText(text2, msg2)
+    showText(text3, "")
 #    text3.insert("1.0", playlistName[currPlaylist]	# if no station name, use the label
 
 
@@ -1333,6 +3289,7 @@ logger.debug("vvvvvvvvvv  Main program logic  vvvvvvvvvvvvvvv")
 #	so we may have to catch up with what MPD is currently doing,
 #	or determine initial position from the .ini file.
 #
+setBinaryLimit()			# bigger chunks for artwork transfers
 currStatus = MPD('status')		# getCurrStatus()  # get MPD's current status
 
 displaySwitches()			# display the toggle switches
@@ -1386,7 +3343,9 @@ if currPlaylist != "":
         button_prev.configure( bg=colrDisabled, text=" ", command=btn_disabled)
         button_next.configure( bg=colrDisabled, text=" ", command=btn_disabled)
         button_remove.configure(bg=colrDisabled, text=" ", command=btn_disabled)
-logger.debug(f"  after check playlist   currStatus['state']={currStatus['state']}. len(currSong)={len(currSong)}" )
+    else:
+        indexQueue()			# names for [Select]
+logger.debug(f"  after check playlist   currStatus['state']={currStatus['state']}. currSong={currSong}" )
 
 
 #########################################################################
@@ -1404,17 +3363,114 @@ logger.debug(f"  after check playlist   currStatus['state']={currStatus['state']
 # But what if the user interrupts the current song by pressing another button ?
 #
 prevState = ''			# the previous currStatus['state']
-prevSong = []			# the previous song
-while True:			# currStatus['state'] == 'play':
-    currStatus = client.status()		# update current MPD status
-    currSong = client.currentsong()		# display the current song
-    if 'title' in currSong:     dispSong = "title: " + currSong['title']
-    elif 'name' in currSong:    dispSong = "name: " + currSong['name']
-    elif 'file' in currSong:    dispSong = "file: " + currSong['file']
-    else:		        dispSong = currSong		# f"len={len(currSong)}"
-#        logger.debug(f"now_playing  currStatus={currStatus['state']}, currPlaylist={currPlaylist}, Song={dispSong}")
-#        logger.debug(" ")
-    logger.debug(f"now_playing  Playlist={currPlaylist}, Status={currStatus['state']}, currSong={dispSong}.")
+prevSong = None			# the previous song
+pendingChanges = set(idleSubsystems)	# changes reported by MPD, but not yet displayed
+songKey = None			# (songid, queue version) from the status currSong was fetched with
+
+#
+#	watchMPD checks (without waiting) whether MPD has reported a change,
+#	and if so triggers a status refresh.  In 'idle' mode TKinter watches
+#	the idle connection's socket and calls watchMPD when MPD answers, so
+#	nothing runs at all while MPD is quiet.
+#	In 'poll' mode it just refreshes the status every 2 seconds.
+#
+idleWatchFd = None		# the idle socket TKinter is watching for us
+
+def watchMPD():
+    if eventMode == 'idle' and mpdBackend is not None:
+        return				# the asyncio backend tells us via idleChanged()
+    if eventMode == 'idle':
+        changed = idleCheck(0)
+        if changed:
+            pendingChanges.update(changed)
+            trigger('status', refreshStatus)
+            pendingChanges.update(idleCheck(0))	# and start waiting again
+        if idlePending and tkWatchesFiles:
+            watchIdleSocket(idleClient.fileno())	# wake us when MPD answers
+        else:
+            watchIdleSocket(None)
+            # Windows TKinter can't watch sockets, and if the idle 
+            #	connection is down idleCheck needs to try again later
+            schedule('watch', 50 if idlePending else 1000, watchMPD)
+    else:
+        pendingChanges.update(idleSubsystems)
+        trigger('status', refreshStatus)
+        schedule('watch', 2000, watchMPD)
+
+
+def watchIdleSocket(fd):
+    global idleWatchFd
+    if fd == idleWatchFd:
+        return
+    if idleWatchFd is not None:
+        window.tk.deletefilehandler(idleWatchFd)
+    idleWatchFd = fd
+    if fd is not None:
+        window.tk.createfilehandler(fd, tk.READABLE, lambda fd, mask: watchMPD())
+
+
+def idleChanged(changed):
+    # the asyncio backend's idle connection reported changes
+    pendingChanges.update(changed)
+    trigger('status', refreshStatus)
+
+
+#
+#	refreshStatus gets MPD's status, and updates the 'now playing' display
+#
+statusRequested = False		# True while the worker thread is fetching the status
+
+def refreshStatus():
+    global statusRequested
+    if statusRequested:
+        return				# showStatus will refresh again if there are new changes
+    statusRequested = True
+    changed = list(pendingChanges)
+    pendingChanges.clear()
+    isStream = playlistType.get(currPlaylist) == 'stream'
+    mpdSubmit(fetchStatus, changed, prefetched['song'], songKey, isStream, callback=showStatus,
+              onError=lambda e: statusFailed(changed))
+
+
+def statusFailed(changed):
+    # fetchStatus failed - try again shortly, rather than never refreshing again
+    global statusRequested
+    statusRequested = False
+    pendingChanges.update(changed)
+    schedule('status', 2000, refreshStatus)
+
+
+def fetchStatus(changed, nextSong, songKey, isStream):	# runs on the MPD worker thread
+    status = MPD('status')		# update current MPD status
+    status['fetched'] = time.monotonic()	# when 'elapsed' was correct
+    song = None
+    # only ask for the current song when status shows a different song, 
+    #	or the queue has changed under it.  A radio stream keeps the same
+    #	songid, so for streams a player change could be a new title.
+    if (status.get('songid'), status.get('playlist')) != songKey or (isStream and 'player' in changed):
+        # and not even then if we already fetched it as the next song
+        if nextSong is not None and 'songid' in status and int(status['songid']) == nextSong.id:
+            song = nextSong
+        else:
+            song = Song(MPD('currentsong'))
+    return changed, status, song
+
+
+def showStatus(result):
+    global currStatus, currSong, currPlaylist, prevState, prevSong, statusRequested, songKey
+    changed, currStatus, song = result
+    statusRequested = False
+    if pendingChanges:
+        trigger('status', refreshStatus)	# MPD reported more changes while we were busy
+    indexCheck()			# has the queue changed under the [Select] index ?
+    if song is not None:
+        currSong = song				# display the current song
+        songKey = (currStatus.get('songid'), currStatus.get('playlist'))
+    if currSong.title:          dispSong = "title: " + currSong.title
+    elif currSong.name:         dispSong = "name: " + currSong.name
+    elif currSong.file:         dispSong = "file: " + currSong.file
+    else:		        dispSong = currSong
+    logger.debug(f"now_playing  Playlist={currPlaylist}, Status={currStatus['state']}, currSong={dispSong}, changed={changed}.")
 
     #
     # check whether play/pause/stop state has changed
@@ -1443,14 +3499,14 @@ while True:			# currStatus['state'] == 'play':
 
     if currPlaylist == '':
         msg1 = f"-- Press one of the playlist buttons to start --"
-    elif len(currSong) == 0:
+    elif not currSong:
         msg1 = f"-- Playlist '{currPlaylist}' selected.  Press [Play] to start playing --"
 
     if msg1 != '':			# an error was detected
         displayError(msg1,msg2)		# display error message
-        window.update()
-        time.sleep(2)
-        continue			# skip to next while iteration
+        cancelTask('progress')
+        cancelTask('resync')
+        return				# wait for MPD to do something
 
     #
     # if song has changed, (file: or title:) update the Now playing information
@@ -1465,21 +3521,45 @@ while True:			# currStatus['state'] == 'play':
         else:
             logger.info(f"now_playing - unexpected playlistType '{playlistType[currPlaylist]}' for playlist '{currPlaylist}'")
         prevSong = currSong
-        if 'title' in currSong:
-            updateIni("serverstats","lastsongtitle",currSong['title'] )
+        if currSong.title:
+            updateIni("serverstats","lastsongtitle",currSong.title )
 
+    if playlistType[currPlaylist] == 'playlist':
+         displayprogress()		# update the elapsed time each refresh
+         prefetchNext()
 
+    #
+    # MPD does not report the elapsed time changing, so while a track 
+    #	is playing count it ourselves, and check with MPD now and then
+    #
+    if currStatus['state'] == 'play' and playlistType[currPlaylist] == 'playlist':
+        scheduleProgress()
+        if eventMode == 'idle':
+            schedule('resync', int(resyncInterval * 1000), refreshStatus)
+    else:
+        cancelTask('progress')
+        cancelTask('resync')
 
-    if playlistType[currPlaylist] == 'playlist':
-         displayprogress()		# update the elapsed time each iteration
 
-    window.update()
-    time.sleep(2)
+#
+# start the MPD worker thread and the tasks which keep the display 
+#	up to date, then hand over to TKinter
+#
+mpdThread.start()
+startResults()
+schedule('prewarm', 1000, prewarmRadioArt)	# after the window has first been drawn
+trigger('status', refreshStatus)
+if eventMode == 'idle' and mpdBackend is not None:
+    mpdBackend.watchIdle()
+else:
+    schedule('watch', 50, watchMPD)
 
-# should never get to end of loop, unless program has ended
 logger.debug(" ")
-logger.debug('######### SHOULD NEVER GET HERE')
 logger.debug(f"-----=====<<<<<   Passing control to TKinter >>>>>=====----- currStatus={currStatus}, currSong={currSong}." )
 logger.debug(" ")
 window.mainloop()  # Run the (not defined with 'def') main window loop.
-# From here on the program is driven by button presses detected by TKinter
+# From here on the program is driven by button presses detected by TKinter,
+#	and the tasks scheduled with window.after()
+logger.debug("TKinter mainloop has ended")
+if len(iniPending) > 0:			# the window was closed without [Quit]
+    writeIni()